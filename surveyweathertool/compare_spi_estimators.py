@@ -0,0 +1,18 @@
+## Comparing the SPI of the gamma estimators on the clipped precipitation data
+
+from src.survey.helper import dataframe_reader
+from src.weather.weather_pipeline import compare_spi_estimators
+from src.weather.constants import RAW_PATH_NIG_CLIPPED_PRECIPITATION
+
+
+def run_comparison(data_path_precipitation: str = RAW_PATH_NIG_CLIPPED_PRECIPITATION):
+    weather_precipitation_df = dataframe_reader(file_path=data_path_precipitation)
+    print(f"**** Precipitation size: {weather_precipitation_df.shape}")
+
+    comparison = compare_spi_estimators(df=weather_precipitation_df)
+    print(comparison.to_string(index=False))
+    return comparison
+
+
+if __name__ == "__main__":
+    run_comparison()
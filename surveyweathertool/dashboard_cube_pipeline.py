@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pandas as pd
+
+from src.dashboard.utils import admin_weather_cube_path, preprocess_weather_data
+from src.weather.utils import read_shape_file
+from src.weather.weather_pipeline import build_admin_weather_cube
+from src.weather.constants import (
+    ADMIN_WEATHER_CUBE_PATH,
+    DASHBOARD_ADMIN_LEVELS,
+    DASHBOARD_WEATHER_INDICATORS,
+    JOINED_WEATHER_DATA_PATH,
+    NIGERIA_SHAPE_PATH_FILE,
+)
+
+
+def run_dashboard_cube_pipeline(
+    weather_data_path=JOINED_WEATHER_DATA_PATH,
+    cube_path=ADMIN_WEATHER_CUBE_PATH,
+):
+    # Admin level weather aggregates read by the LSMS-ISA Dashboard page, named after the weather data checksum
+    cube_file = admin_weather_cube_path(weather_data_path, cube_path)
+    if cube_file.exists():
+        print(f"'{cube_file}' already exists for: {weather_data_path}")
+        return
+
+    print(f"Building the admin weather cube from: {weather_data_path}")
+    weather_data_df = preprocess_weather_data(pd.read_parquet(weather_data_path))
+    os.makedirs(cube_path, exist_ok=True)
+    tmp_file = cube_file.with_name(f"{cube_file.name}.tmp")
+
+    admin_weather_cube = build_admin_weather_cube(
+        nigeria_shape_df=read_shape_file(data_path=NIGERIA_SHAPE_PATH_FILE),
+        weather_df=weather_data_df,
+        weather_data_names=DASHBOARD_WEATHER_INDICATORS,
+        admin_levels=DASHBOARD_ADMIN_LEVELS,
+        output_path=tmp_file,
+    )
+    os.replace(tmp_file, cube_file)
+
+    print(f"Admin weather cube with {admin_weather_cube.shape[0]} rows written to: {cube_file}")
+
+    return
+
+
+if __name__ == "__main__":
+    # Optionally the joined weather data file the dashboard reads, e.g. its downloaded copy
+    run_dashboard_cube_pipeline(*sys.argv[1:2])
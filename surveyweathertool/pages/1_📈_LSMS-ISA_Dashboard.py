@@ -6,15 +6,12 @@ from streamlit_folium import folium_static
 from src.dashboard.utils import (
     filter_survey,
     filter_weather,
-    load_data_from_google_drive,
-    preprocess_weather_data
-)
-from src.weather.weather_pipeline import (
-    aggr_monthly,
-    combine_map_weather,
-    aggr_yearly,
-    aggr_seosonal_nigeria,
+    load_dashboard_file,
+    load_admin_weather_cube_file,
+    load_dissolved_map,
+    load_admin_geojson,
 )
+from src.weather.weather_pipeline import query_admin_weather
 from src.weather.utils import read_shape_file
 from src.weather.create_visuals import (
     generate_choropleth,
@@ -28,7 +25,6 @@ from src.weather.constants import (
     PRECIPITATION_FILE,
     NIGERIA_SHAPE_PATH_FILE,
     LSMS_SURVEY_FILE,
-    JOINED_WEATHER_DATA_FILE
 )
 from src.weather_x_survey.weather_survey import combine_with_poverty_index
 
@@ -159,22 +155,21 @@ if submitted:
     with st.spinner("Weather data is being read and preprocessed..."):
         # Read Data for Dashboard (Once and st.caches it)
         nigeria_shape_df = read_shape_file(data_path=NIGERIA_SHAPE_PATH_FILE)
-        # precipitation_indicators_data = load_data_from_google_drive(
+        # precipitation_indicators_data = load_dashboard_file(
         #     file_to_load=PRECIPITATION_FILE
         # )
         # precipitation_indicators = pd.read_parquet(precipitation_indicators_data)
-        # temperature_indicators_data = load_data_from_google_drive(
+        # temperature_indicators_data = load_dashboard_file(
         #     file_to_load=TEMPERATURE_FILE
         # )
         # temperature_indicators = pd.read_parquet(temperature_indicators_data)
-        weather_data = load_data_from_google_drive(
-            file_to_load=JOINED_WEATHER_DATA_FILE
-        )
-        weather_data_df = pd.read_parquet(weather_data)
-        weather_data_df = preprocess_weather_data(weather_data_df)
+        # Admin level aggregates of the joined weather data, built once by dashboard_cube_pipeline.py
+        admin_weather_cube_file = load_admin_weather_cube_file()
+        dissolved_df = load_dissolved_map(col_dissolve=admin_choice)
+        admin_geojson = load_admin_geojson(col_dissolve=admin_choice)
     st.toast("Survey data is being read and preprocessed", icon="⌛")
     with st.spinner("Survey data is being read and preprocessed..."):
-        lsms_survey_data = load_data_from_google_drive(file_to_load=LSMS_SURVEY_FILE)
+        lsms_survey_data = load_dashboard_file(file_to_load=LSMS_SURVEY_FILE)
         survey_data_df = pd.read_pickle(lsms_survey_data).reset_index()
         target_epsg = 4326
 
@@ -182,11 +177,11 @@ if submitted:
         poverty_index_dropdown = None
 
     dict_value_cols = {
-        "Precipitation (mm)": (weather_data_df, "Blues"),
-        "Temperature (°C)": (weather_data_df, "Reds"),
-        "Drought": (weather_data_df, "Blues"),
-        "Heavy Rain": (weather_data_df, "Blues"),
-        "Heat Wave": (weather_data_df, "Blues"),
+        "Precipitation (mm)": (admin_weather_cube_file, "Blues"),
+        "Temperature (°C)": (admin_weather_cube_file, "Reds"),
+        "Drought": (admin_weather_cube_file, "Blues"),
+        "Heavy Rain": (admin_weather_cube_file, "Blues"),
+        "Heat Wave": (admin_weather_cube_file, "Blues"),
     }
 
     weather_indicators = {
@@ -222,27 +217,18 @@ if submitted:
         weather_data_name = weather_indicators[weather]
         weather_columns.append(weather_data_name)
 
-        if level == "daily":
-            agg_dict = {weather_data_name: "mean"}
-            level = weather_data_name
-        else:
-            agg_dict = {
-                "mean": "mean",
-                "min": "mean",
-                "max": "mean",
-            }
-        st.toast("Combining weather data to maps", icon="⌛")
-        with st.spinner("Combining weather data to maps..."):
-            combined_df = combine_map_weather(
-                nigeria_shape_df=nigeria_shape_df,
-                weather_df=dict_value_cols[weather][0],
-                col_dissolve=admin_choice,
-                weather_data_name=weather_indicators[weather],
-                agg_dict=agg_dict,
-                level=level,
-                target_epsg=target_epsg,
-            )
-            combined_dfs[weather_data_name] = combined_df
+        # Only the selected year/month/season of the cube is read
+        combined_df = query_admin_weather(
+            cube_source=dict_value_cols[weather][0],
+            dissolved_df=dissolved_df,
+            col_dissolve=admin_choice,
+            weather_data_name=weather_data_name,
+            level=level,
+            year=year_choice_dropdown,
+            month=month_choice_dropdown,
+            season=season_choice,
+        )
+        combined_dfs[weather_data_name] = combined_df
 
     if weather_dropdown is None:
         weather_size = 0
@@ -288,53 +274,6 @@ if submitted:
             #     year=year_choice_dropdown,
             # )
 
-            if level == "month":
-                aggregated_prec_grid_1 = aggr_monthly(
-                    df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                    column_aggr=weather_columns[0],
-                )
-                aggregated_prec_grid_2 = aggr_monthly(
-                    df=dict_value_cols[weather_dropdown[1]][0].copy(),
-                    column_aggr=weather_columns[1],
-                )
-            elif level == "year":
-                aggregated_prec_grid_1 = aggr_yearly(
-                    df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                    column_aggr=weather_columns[0],
-                )
-                aggregated_prec_grid_2 = aggr_yearly(
-                    df=dict_value_cols[weather_dropdown[1]][0].copy(),
-                    column_aggr=weather_columns[1],
-                )
-            elif level == "season":
-                aggregated_prec_temp_1 = aggr_monthly(
-                    df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                    column_aggr=weather_columns[0],
-                )
-                aggregated_prec_grid_1 = aggr_seosonal_nigeria(
-                    df=aggregated_prec_temp_1,
-                )
-                aggregated_prec_temp_2 = aggr_monthly(
-                    df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                    column_aggr=weather_columns[0],
-                )
-                aggregated_prec_grid_2 = aggr_seosonal_nigeria(
-                    df=aggregated_prec_temp_2,
-                )
-
-            filtered_grid_1 = filter_weather(
-                weather_df=aggregated_prec_grid_1.copy(),
-                year=year_choice_dropdown,
-                month=month_choice_dropdown,
-                season=season_choice,
-            )
-            filtered_grid_2 = filter_weather(
-                weather_df=aggregated_prec_grid_2.copy(),
-                year=year_choice_dropdown,
-                month=month_choice_dropdown,
-                season=season_choice,
-            )
-
             st.markdown(
                 f"<h4 style='text-align: center; color: black;'>Bivariate map for {weather_dropdown[0]} and {weather_dropdown[1]} </h4>",
                 unsafe_allow_html=True,
@@ -347,6 +286,7 @@ if submitted:
                 legend_1=legends[weather_dropdown[0]],
                 legend_2=legends[weather_dropdown[1]],
                 admin=admin_choice,
+                geo_data=admin_geojson,
             )
             folium_static(bivariate_map)
 
@@ -396,6 +336,7 @@ if submitted:
                 generate_choropleth(
                     combined_df=filtered_df_1,
                     admin=admin_choice,
+                    geo_data=admin_geojson,
                     column="mean",
                     legend_name=legends[weather_dropdown[0]],
                     fill_color=dict_value_cols[weather_dropdown[0]][1],
@@ -410,6 +351,7 @@ if submitted:
                 generate_choropleth(
                     combined_df=filtered_df_2,
                     admin=admin_choice,
+                    geo_data=admin_geojson,
                     column="mean",
                     legend_name=legends[weather_dropdown[1]],
                     fill_color=dict_value_cols[weather_dropdown[1]][1],
@@ -436,22 +378,6 @@ if submitted:
                 season=season_choice,
             )
 
-            aggregated_prec_grid_1 = aggr_monthly(
-                df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                column_aggr=weather_columns[0],
-            )
-            filtered_grid_1 = filter_weather(
-                weather_df=aggregated_prec_grid_1.copy(),
-                year=year_choice_dropdown,
-                month=month_choice_dropdown,
-                season=season_choice,
-            )
-
-            aggregated_prec_grid_1_year = aggr_yearly(
-                df=filtered_grid_1.copy(),
-                column_aggr="mean",
-            )
-
             combined_df_1 = combine_with_poverty_index(
                 map_df=nigeria_shape_df,
                 household_df=filtered_df_1.copy(),
@@ -472,6 +398,7 @@ if submitted:
                 legend_1=poverty_legend,
                 legend_2=legends[weather_dropdown[0]],
                 admin=admin_choice,
+                geo_data=admin_geojson,
             )
             folium_static(bivariate_map)
 
@@ -508,6 +435,7 @@ if submitted:
                 generate_choropleth(
                     combined_df=combined_df_1,
                     admin=admin_choice,
+                    geo_data=admin_geojson,
                     column=poverty_indicators[poverty_index_dropdown],
                     legend_name=poverty_legend,
                     fill_color="Reds",
@@ -522,6 +450,7 @@ if submitted:
                 generate_choropleth(
                     combined_df=filtered_df_2,
                     admin=admin_choice,
+                    geo_data=admin_geojson,
                     column="mean",
                     legend_name=legends[weather_dropdown[0]],
                     fill_color=dict_value_cols[weather_dropdown[0]][1],
@@ -561,35 +490,6 @@ if submitted:
                 season=season_choice,
             )
 
-            if level == "month":
-                aggregated_prec_grid_1 = aggr_monthly(
-                    df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                    column_aggr=weather_columns[0],
-                )
-
-            elif level == "year":
-                aggregated_prec_grid_1 = aggr_yearly(
-                    df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                    column_aggr=weather_columns[0],
-                )
-
-            elif level == "season":
-                aggregated_prec_temp = aggr_monthly(
-                    df=dict_value_cols[weather_dropdown[0]][0].copy(),
-                    column_aggr=weather_columns[0],
-                )
-
-                aggregated_prec_grid_1 = aggr_seosonal_nigeria(
-                    df=aggregated_prec_temp.copy(),
-                )
-
-            filtered_grid_1 = filter_weather(
-                weather_df=aggregated_prec_grid_1.copy(),
-                year=year_choice_dropdown,
-                month=month_choice_dropdown,
-                season=season_choice,
-            )
-
             # st.plotly_chart(
             #     generate_interactive_time_series(
             #         df=filtered_df_1.copy(), weather_data_name=weather_columns[0]
@@ -628,6 +528,7 @@ if submitted:
                 generate_choropleth(
                     combined_df=filtered_df_1,
                     admin=admin_choice,
+                    geo_data=admin_geojson,
                     column="mean",
                     legend_name=legends[weather_dropdown[0]],
                     fill_color=dict_value_cols[weather_dropdown[0]][1],
@@ -665,6 +566,7 @@ if submitted:
                 generate_choropleth(
                     combined_df=combined_df_1,
                     admin=admin_choice,
+                    geo_data=admin_geojson,
                     column=poverty_indicators[poverty_index_dropdown],
                     legend_name=poverty_legend,
                     fill_color="Reds",
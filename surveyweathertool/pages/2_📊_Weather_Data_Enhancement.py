@@ -13,9 +13,13 @@ from src.dashboard.utils import (
     check_if_df_has_lat_long,
     preprocess_data_input,
     preprocess_weather_data,
-    load_data_from_google_drive
+    load_dashboard_file
 )
-from src.weather_x_survey.weather_survey import merge_weather_household
+from src.weather_x_survey.weather_survey import (
+    load_weather_aggregates,
+    merge_weather_household,
+)
+from src.weather.utils import query_weather
 
 from src.weather.constants import PRECIPITATION_FILE, TEMPERATURE_FILE, JOINED_WEATHER_DATA_FILE
 
@@ -75,12 +79,12 @@ if uploaded_file is not None:
     # Read Weather data (Temp and Precip with climate columns) and preprocess it
     st.toast("Weather data is being read and preprocessed", icon="⌛")
     with st.spinner("Weather data is being read and preprocessed..."):
-        # precipitation_indicators_data = load_data_from_google_drive(
+        # precipitation_indicators_data = load_dashboard_file(
         #     file_to_load=PRECIPITATION_FILE
         # )
         # precipitation_indicators = pd.read_parquet(precipitation_indicators_data)
         # precipitation_indicators = preprocess_weather_data(precipitation_indicators)
-        # temperature_indicators_data = load_data_from_google_drive(
+        # temperature_indicators_data = load_dashboard_file(
         #     file_to_load=TEMPERATURE_FILE
         # )
         # temperature_indicators = pd.read_parquet(temperature_indicators_data)
@@ -91,32 +95,37 @@ if uploaded_file is not None:
             "precipitation": ["precipitation", "heavy_rain_index", "spi_index"],
             "temperature": ["temperature", "heatwave_index"],
         }
-        weather_data = load_data_from_google_drive(
+        weather_data = load_dashboard_file(
             file_to_load=JOINED_WEATHER_DATA_FILE
         )
-        weather_data_df = pd.read_parquet(weather_data)
+        # Only read the years of the input data
+        input_years = sorted(input["date"].dt.year.unique())
+        weather_data_df = query_weather(weather_data, year=input_years)
         weather_data_df = preprocess_weather_data(weather_data_df)
-        merged_data = input.copy()
 
     st.toast("Weather features are being created", icon="⌛")
-    # Iterate over each column
+    # All indicators come from the same weather grid, interpolate them together
     with st.spinner("Weather features are being created..."):
-        for key, value_cols in weather_data_indicators_dict.items():
-            if key == "precipitation":
-                weather_df = weather_data_df
-            elif key == "temperature":
-                weather_df = weather_data_df
-            for indicator in value_cols:
-                # Retrieve weather information for the input using interpolated weather data
-                merged_weather_data = merge_weather_household(
-                    input, weather_df, indicator
-                )
-                merged_data = pd.merge(
-                    merged_data,
-                    merged_weather_data,
-                    how="left",
-                    on=["lat", "lon", "date"],
-                )
+        indicators = [
+            indicator
+            for value_cols in weather_data_indicators_dict.values()
+            for indicator in value_cols
+        ]
+        # Monthly means per grid point are cached for this weather file
+        weather_aggregates = load_weather_aggregates(
+            weather_data_df, indicators, source=weather_data, years=input_years
+        )
+        # Retrieve weather information for the input using interpolated weather data
+        merged_weather_data = merge_weather_household(
+            input,
+            weather_data_df,
+            indicators,
+            weather_aggregates=weather_aggregates,
+            metric="haversine",
+        )
+        merged_data = input.join(
+            merged_weather_data.drop(columns=["lat", "lon", "date"])
+        )
 
     st.toast("Weather features have been successfully created", icon="⌛")
     # Print out new dataset and get it download-ready
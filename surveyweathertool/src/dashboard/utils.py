@@ -2,13 +2,37 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from google.oauth2 import service_account
 import io
+import os
 import pandas as pd
 import streamlit as st
 from PIL import Image
 from pathlib import Path
 from typing import List, Optional
 
-from src.weather.weather_pipeline import convert_point_crs
+from src.weather.weather_pipeline import (
+    convert_point_crs,
+    convert_map_crs,
+    dissolve_map,
+    admin_geojson,
+)
+from src.weather.utils import (
+    read_shape_file,
+    read_download_manifest,
+    write_download_manifest,
+    file_sha256,
+    is_download_complete,
+)
+from src.weather.constants import (
+    ADMIN_WEATHER_CUBE_PATH,
+    DASHBOARD_CACHE_PATH,
+    DASHBOARD_DATA_BACKEND,
+    DASHBOARD_FILE_NAMES,
+    DASHBOARD_LOCAL_DATA_PATH,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_MANIFEST_NAME,
+    JOINED_WEATHER_DATA_FILE,
+    NIGERIA_SHAPE_PATH_FILE,
+)
 
 
 def read_logos(logos_path):
@@ -151,14 +175,10 @@ def preprocess_weather_data(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-@st.cache_data(show_spinner=False)
-def load_data_from_google_drive(file_to_load: str):
+def google_drive_service():
     """
-    Load data from Google Drive into a DataFrame
-    :param file_to_load: The ID of the file to load from Google Drive
-    :return: A DataFrame containing the data from the file
+    Create a read-only Google Drive API service from the service account in the Streamlit secrets.
     """
-
     # Define the scope for accessing Google Drive - Read Only
     SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
 
@@ -168,17 +188,115 @@ def load_data_from_google_drive(file_to_load: str):
     )
 
     # Create a Google Drive API service object
-    drive_service = build("drive", "v3", credentials=credentials)
+    return build("drive", "v3", credentials=credentials)
+
+
+def load_file_from_google_drive(file_to_load: str, cache_path: Path = DASHBOARD_CACHE_PATH) -> Path:
+    """
+    Google Drive backend of load_dashboard_file: download a file once into a local cache.
+
+    Files are stored in cache_path under their SHA-256 checksum, and the manifest of the cache records the
+    Drive modifiedTime and md5Checksum of every file id. A cached file is read again as long as Drive reports
+    the same version; without network or credentials, the cached file is used as is.
+
+    Parameters:
+        file_to_load (str): The ID of the file on Google Drive.
+        cache_path (Path): Directory of the cached files.
 
+    Returns:
+        Path: The local file.
+    """
+    manifest_path = Path(cache_path) / DOWNLOAD_MANIFEST_NAME
+    manifest = read_download_manifest(manifest_path)
+    entry = manifest.get(file_to_load)
+    cached_file = Path(cache_path) / entry["file"] if entry is not None else None
+    is_cached = entry is not None and is_download_complete(cached_file, entry)
+
+    try:
+        drive_service = google_drive_service()
+        metadata = (
+            drive_service.files()
+            .get(fileId=file_to_load, fields="name,modifiedTime,md5Checksum")
+            .execute()
+        )
+    except Exception as error:
+        if is_cached:
+            print(f"Could not reach Google Drive ({error}), using the cached {cached_file}")
+            return cached_file
+        raise
+
+    if (
+        is_cached
+        and entry.get("modified_time") == metadata.get("modifiedTime")
+        and entry.get("md5_checksum") == metadata.get("md5Checksum")
+    ):
+        return cached_file
+
+    print(f"Downloading {metadata.get('name', file_to_load)} from Google Drive")
+    os.makedirs(cache_path, exist_ok=True)
+    part_path = Path(cache_path) / f"{file_to_load}.part"
     request = drive_service.files().get_media(fileId=file_to_load)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-        fh.seek(0)  # Reset the file pointer to the beginning
-        if fh.readable():
-            return fh
+    with io.FileIO(part_path, "wb") as fh:
+        downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE * 10)
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+
+    sha256 = file_sha256(part_path)
+    file_name = f"{sha256}{Path(metadata.get('name', '')).suffix}"
+    os.replace(part_path, Path(cache_path) / file_name)
+    manifest[file_to_load] = {
+        "file": file_name,
+        "name": metadata.get("name"),
+        "size": os.path.getsize(Path(cache_path) / file_name),
+        "sha256": sha256,
+        "modified_time": metadata.get("modifiedTime"),
+        "md5_checksum": metadata.get("md5Checksum"),
+    }
+    write_download_manifest(manifest_path, manifest)
+
+    # Remove the previous version, unless another file id has the same content
+    if cached_file is not None and cached_file.name not in {e["file"] for e in manifest.values()}:
+        cached_file.unlink(missing_ok=True)
+    return Path(cache_path) / file_name
+
+
+def load_file_from_local(file_to_load: str, data_path: Path = DASHBOARD_LOCAL_DATA_PATH) -> Path:
+    """
+    Local backend of load_dashboard_file: read a file from a local directory, without network.
+
+    Parameters:
+        file_to_load (str): The Google Drive ID of the file (named after DASHBOARD_FILE_NAMES in data_path),
+                            or the name of a file in data_path.
+        data_path (Path): Directory of the files.
+
+    Returns:
+        Path: The local file.
+    """
+    file_path = Path(data_path) / DASHBOARD_FILE_NAMES.get(file_to_load, file_to_load)
+    if not file_path.exists():
+        raise ValueError(f"{file_path} does not exist, add it to {data_path} to use the local backend")
+    return file_path
+
+
+# Data source backends of the dashboard, see DASHBOARD_DATA_BACKEND
+DATA_SOURCE_BACKENDS = {
+    "google_drive": load_file_from_google_drive,
+    "local": load_file_from_local,
+}
+
+
+@st.cache_data(show_spinner=False)
+def load_dashboard_file(file_to_load: str, backend: str = DASHBOARD_DATA_BACKEND) -> Path:
+    """
+    Get a local copy of a dashboard input file from a data source backend.
+    :param file_to_load: The ID of the file to load from Google Drive, see DASHBOARD_FILE_NAMES
+    :param backend: "google_drive" or "local", see DATA_SOURCE_BACKENDS
+    :return: The path of the local file, to read with pandas
+    """
+    if backend not in DATA_SOURCE_BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, use one of {list(DATA_SOURCE_BACKENDS)}")
+    return DATA_SOURCE_BACKENDS[backend](file_to_load)
 
 
 @st.cache_data(show_spinner=False)
@@ -226,3 +344,94 @@ def dataframe_reader(
     if reset_index:
         data = data.reset_index()
     return data
+
+
+def source_file_sha256(file_path: Path) -> str:
+    """
+    Get the SHA-256 checksum of a downloaded file, from the download manifest of its directory if it is
+    recorded there, otherwise by reading the file.
+
+    Parameters:
+        file_path (Path): The local file.
+
+    Returns:
+        str: The hexadecimal checksum.
+    """
+    file_path = Path(file_path)
+    manifest = read_download_manifest(file_path.parent / DOWNLOAD_MANIFEST_NAME)
+    for file_name, entry in manifest.items():
+        if file_path.name in (file_name, entry.get("file")) and is_download_complete(file_path, entry):
+            return entry["sha256"]
+    return file_sha256(file_path)
+
+
+def admin_weather_cube_path(weather_data_path: Path, cube_path: Path = ADMIN_WEATHER_CUBE_PATH) -> Path:
+    """
+    Get the admin level weather aggregates file built from a joined weather data file.
+
+    The file is named after the checksum of the weather data, so a new version of the weather data never
+    reads the cube of the previous one.
+
+    Parameters:
+        weather_data_path (Path): The joined weather data file.
+        cube_path (Path): Directory of the cubes.
+
+    Returns:
+        Path: The Parquet file of the cube, see build_admin_weather_cube.
+    """
+    return Path(cube_path) / f"admin_weather_cube-{source_file_sha256(weather_data_path)[:16]}.parquet"
+
+
+@st.cache_resource(show_spinner=False)
+def load_admin_weather_cube_file(cube_path: Path = ADMIN_WEATHER_CUBE_PATH) -> Path:
+    """
+    Get the admin level weather aggregates file of the joined weather data of the dashboard.
+
+    The file is built by dashboard_cube_pipeline.py and read with query_admin_weather, one selection at a time.
+
+    Parameters:
+        cube_path (Path): Directory of the cubes.
+
+    Returns:
+        Path: The Parquet file of the cube.
+    """
+    weather_data_path = load_dashboard_file(file_to_load=JOINED_WEATHER_DATA_FILE)
+    cube_file = admin_weather_cube_path(weather_data_path, cube_path)
+    if not cube_file.exists():
+        raise ValueError(
+            f"{cube_file} does not exist, build the admin weather cube of {weather_data_path} with "
+            f"'python dashboard_cube_pipeline.py {weather_data_path}'"
+        )
+    return cube_file
+
+
+@st.cache_resource(show_spinner=False)
+def load_dissolved_map(col_dissolve: str, shape_path: str = NIGERIA_SHAPE_PATH_FILE):
+    """
+    Load the Nigeria map dissolved on an admin column, once per admin level.
+
+    Parameters:
+        col_dissolve (str): Admin column to dissolve on, e.g. "admin1Pcod".
+        shape_path (str): Path to the Nigeria shapefile.
+
+    Returns:
+        gpd.GeoDataFrame: One row per admin unit.
+    """
+    nigeria_shape_df = convert_map_crs(read_shape_file(data_path=shape_path), epsg=4326)
+    return dissolve_map(nigeria_shape_df, col_dissolve)
+
+
+@st.cache_resource(show_spinner=False)
+def load_admin_geojson(col_dissolve: str, shape_path: str = NIGERIA_SHAPE_PATH_FILE) -> str:
+    """
+    Load the simplified GeoJSON of the admin units of the Nigeria map, once per admin level.
+
+    Parameters:
+        col_dissolve (str): Admin column to dissolve on, e.g. "admin1Pcod".
+        shape_path (str): Path to the Nigeria shapefile.
+
+    Returns:
+        str: GeoJSON FeatureCollection for generate_choropleth and generate_bivariate_map.
+    """
+    nigeria_shape_df = convert_map_crs(read_shape_file(data_path=shape_path), epsg=4326)
+    return admin_geojson(nigeria_shape_df, col_dissolve)
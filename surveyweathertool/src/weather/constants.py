@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 RAW_DATA_PATH = Path("/app/data/raw")
@@ -13,6 +14,22 @@ PROCESSED_WEATHER_PATH = Path(f"{PROCESSED_DATA_PATH}/weather")
 PROCESSED_INTERPOLATED_DATA_PATH = Path(
     f"{PROCESSED_WEATHER_PATH}/interpolated_weather"
 )
+CLIP_MASKS_PATH = Path(f"{PROCESSED_WEATHER_PATH}/clip_masks")
+GRID_ADMIN_INDEX_PATH = Path(f"{PROCESSED_WEATHER_PATH}/grid_admin_index")
+WEATHER_AGGREGATES_PATH = Path(f"{PROCESSED_WEATHER_PATH}/aggregates")
+# Stage datasets of the "partitioned" engine of the weather pipeline, one directory per stage
+PARTITIONED_WEATHER_PATH = Path(f"{PROCESSED_WEATHER_PATH}/partitioned")
+# Manifest of the completely downloaded files, written in each download directory
+DOWNLOAD_MANIFEST_NAME = "manifest.json"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+OPEN_METEO_CACHE_PATH = Path(f"{PROCESSED_WEATHER_PATH}/open_meteo_cache")
+OPEN_METEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+OPEN_METEO_DAILY_VARIABLES = [
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "temperature_2m_mean",
+    "precipitation_sum",
+]
 RAW_PRECIPITATION_PATH = (
     f"{PROCESSED_WEATHER_PATH}/nasa_historical_precipitation/final_precipitation.pickle"
 )
@@ -32,6 +49,26 @@ PRECIPITATION_INDICATORS = (
 TEMPERATURE_INDICATORS = f"{PROCESSED_WEATHER_PATH}/interpolated_weather/all_temperature_interpolated_indicators.pickle"
 SPI_PATH_FILE = PRECIPITATION_INDICATORS
 
+# Dissolved admin layers and their simplified GeoJSON, see dissolve_map and admin_geojson
+ADMIN_GEOMETRIES_PATH = Path(f"{PATH_DASHBOARD_INPUT_DATA}/admin_geometries")
+ADMIN_SIMPLIFY_TOLERANCE = 0.01
+
+# Months of the Nigeria seasons of the dashboard, as in aggr_seosonal_nigeria
+NIGERIA_SEASON_MONTHS = {"Wet": [4, 5, 6, 7, 8, 9], "Dry": [1, 2, 3, 10, 11, 12]}
+
+# Admin level weather aggregates of the dashboard, see build_admin_weather_cube
+JOINED_WEATHER_DATA_PATH = f"{PROCESSED_WEATHER_PATH}/joined_weather_data.parquet"
+# Cubes named after the SHA-256 checksum of the joined weather data they were built from
+ADMIN_WEATHER_CUBE_PATH = Path(f"{PATH_DASHBOARD_INPUT_DATA}/admin_weather_cubes")
+DASHBOARD_ADMIN_LEVELS = ["admin1Pcod", "admin2Pcod"]
+DASHBOARD_WEATHER_INDICATORS = [
+    "precipitation",
+    "temperature",
+    "spi_index",
+    "heavy_rain_index",
+    "heatwave_index",
+]
+
 # Dasbhoard input data on Google Drive
 LSMS_SURVEY_FILE = "16K6TFFe9nZD_tos5YDBrEVWHAA4zNx4P"
 JOINED_WEATHER_DATA_FILE = "1WLaf5ywBGJLhpr8VvLr67VRK3tL_KQSN"
@@ -40,3 +77,18 @@ JOINED_WEATHER_DATA_FILE = "1WLaf5ywBGJLhpr8VvLr67VRK3tL_KQSN"
 PRECIPITATION_FILE = "1L4htbJs3spx-Ojy2sRz82YAmO4nKBkc1"
 TEMPERATURE_FILE = "1_6PtYtEbneuSeq4wywQDvKbrpOqZpOvt"
 
+# Backend of the dashboard input data, "google_drive" or "local", see load_dashboard_file
+DASHBOARD_DATA_BACKEND = os.environ.get("DASHBOARD_DATA_BACKEND", "google_drive")
+# Downloaded Google Drive files, named by their SHA-256 checksum
+DASHBOARD_CACHE_PATH = Path(f"{PATH_DASHBOARD_INPUT_DATA}/cache")
+# Files of the local backend, named after DASHBOARD_FILE_NAMES
+DASHBOARD_LOCAL_DATA_PATH = Path(
+    os.environ.get("DASHBOARD_LOCAL_DATA_PATH", f"{PATH_DASHBOARD_INPUT_DATA}/files")
+)
+DASHBOARD_FILE_NAMES = {
+    LSMS_SURVEY_FILE: "lsms_survey.pickle",
+    JOINED_WEATHER_DATA_FILE: "joined_weather_data.parquet",
+    PRECIPITATION_FILE: "precipitation_indicators.parquet",
+    TEMPERATURE_FILE: "temperature_indicators.parquet",
+}
+
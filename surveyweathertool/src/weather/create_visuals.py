@@ -8,6 +8,8 @@ from src.dashboard.utils import read_logos
 import matplotlib.pyplot as plt
 import seaborn as sns
 import folium
+import json
+from typing import Optional
 from IPython.display import display
 
 
@@ -42,6 +44,35 @@ def get_center(df):
     return center
 
 
+def choropleth_geojson(combined_df: gpd.GeoDataFrame, admin: str, geo_data: Optional[str] = None):
+    """
+    GeoJSON of the admin units of a map.
+
+    Parameters:
+    -----------
+    combined_df : gpd.GeoDataFrame
+        The data of the map, with the admin column.
+    admin : str
+        The admin column, used as feature property.
+    geo_data : str, optional
+        Cached GeoJSON of all admin units (see admin_geojson). If given, only its features of the
+        admin units in combined_df are kept instead of serializing the geometry of combined_df.
+
+    Returns:
+    --------
+    str or dict
+        The GeoJSON FeatureCollection.
+    """
+    if geo_data is None:
+        return combined_df.to_json()
+    admin_codes = set(combined_df[admin])
+    geojson = json.loads(geo_data)
+    geojson["features"] = [
+        feature for feature in geojson["features"] if feature["properties"][admin] in admin_codes
+    ]
+    return geojson
+
+
 def generate_choropleth(
     combined_df: gpd.GeoDataFrame,
     admin: str,
@@ -49,6 +80,7 @@ def generate_choropleth(
     legend_name: str,
     fill_color: str = "YlOrRd",
     zoom_start: int = 5,
+    geo_data: Optional[str] = None,
     **kwargs,
 ):
     """
@@ -67,6 +99,8 @@ def generate_choropleth(
         The legend title of the map.
     zoom_start: int, optional
         zoom level of the map
+    geo_data : str, optional
+        Cached simplified GeoJSON of the admin units, used instead of the geometry of combined_df.
     fill_color : str, optional
         Color palette for the choropleth. Default is "YlOrRd".
         Please change this if you want to plot for something not related to temperature.
@@ -83,7 +117,7 @@ def generate_choropleth(
         )
     center = get_center(combined_df)
     # Convert the GeoDataFrame to GeoJSON
-    geojson_data = combined_df.to_json()
+    geojson_data = choropleth_geojson(combined_df, admin, geo_data)
 
     # Create a Folium map
     m = folium.Map(location=center, zoom_start=zoom_start)
@@ -119,6 +153,7 @@ def generate_bivariate_map(
     legend_1: str,
     legend_2: str,
     zoom_start: int = 5,
+    geo_data: Optional[str] = None,
     **kwargs,
 ):
     """
@@ -143,6 +178,8 @@ def generate_bivariate_map(
         The legend title for combined_df_2 to consider for the bivariate map
     zoom_start: int, optional
         zoom level of the map
+    geo_data : str, optional
+        Cached simplified GeoJSON of the admin units, used instead of the geometry of combined_df_1.
 
     Returns:
     --------
@@ -151,7 +188,7 @@ def generate_bivariate_map(
     """
     center = get_center(combined_df_1)
     # Convert the GeoDataFrame to GeoJSON
-    geojson_data = combined_df_1.to_json()
+    geojson_data = choropleth_geojson(combined_df_1, admin, geo_data)
 
     # Create a Folium map
     m = folium.Map(location=center, zoom_start=zoom_start)
@@ -2,81 +2,248 @@
 
 # Import statements
 import os
+import shutil
 import time
 import pandas as pd
 from pathlib import Path
 from src.survey.helper import dataframe_reader
 from src.weather.weather_pipeline import calculate_SPI
-from src.weather.utils import read_shape_file, ncToCSV, preprocess_weather_datasets
+from src.weather.utils import (
+    read_shape_file,
+    ncToParquet,
+    preprocess_weather_datasets,
+    open_weather_dataset,
+    dataset_years,
+    read_dataset_year,
+    append_to_dataset,
+)
 from src.weather.weather_pipeline import interpolate_data_for_all_dates, clip_data
 from src.weather.weather_pipeline import heatwave_heavy_rainfall_indicators
 from src.weather.constants import *
 
 
-def preprocess_data(source_path, dest_path, weather, coordinate_limits):
+def preprocess_data(source_path, dest_path, weather, coordinate_limits, value_column=None):
     """
-    Preprocess weather data by filling missing values, grouping, and saving as Pickle files.
+    Preprocess weather data by slicing the coordinate limits, filling missing values and saving as Parquet.
 
     Parameters:
-    source_path (str): Directory containing source CSV files.
+    source_path (str): Directory containing source NetCDF files.
     dest_path (str): Directory where processed files will be saved.
+    weather (str): Name of the weather variable in the NetCDF files (e.g., "precip").
     coordinate_limits (list): List of latitude and longitude coordinate limits.
+    value_column (str): Name of the value column in the dataset, "precipitation" or "temperature" for the
+                        "partitioned" engine of get_weather_data. Default is weather.
+
+    Returns:
+    Path: The Parquet dataset of all files, partitioned by year, in dest_path, with 'date', 'lat', 'lon'
+    and value columns.
 
     Notes:
-    This function assumes that the CSV files have columns 'lat', 'lon', and 'precip'.
+    This function assumes that the NetCDF files have 'time', 'lat' and 'lon' dimensions.
     """
     print("Start preprocessing the weather data")
 
     print(f"Check if {dest_path} already exists, if not create it")
     os.makedirs(dest_path, exist_ok=True)
+    dataset_path = Path(dest_path).joinpath(weather)
 
-    files_to_process = []
-
-    for filename in os.listdir(source_path):
+    for filename in sorted(os.listdir(source_path)):
+        if not filename.endswith(".nc"):
+            continue
         print(f"Preprocess the file {filename}")
-        # Convert NetCDF to CSV and filter based on coordinates
-        ncToCSV(
-            source_path.joinpath(filename),
-            dest_path.joinpath(Path(filename[:-3] + ".csv")),
+        # Slice the coordinates, fill missing values and write the year partition
+        ncToParquet(
+            Path(source_path).joinpath(filename),
+            dataset_path,
             coordinate_limits,
+            weather,
+            value_column,
         )
-        df = pd.read_csv(dest_path.joinpath(Path(filename[:-3] + ".csv")))
-
-        # Handle missing values and filter data
-        # Get all the files where the missing data for a location is less than 365 days in an year
-        filteredDF = df[df.iloc[:, 2].isna() == True]
-        filteredDF = filteredDF.fillna(0)
-        grouping_columns = list(filteredDF.iloc[:, :3].columns)
-        filteredDF = filteredDF.groupby(grouping_columns).size()
-        filteredDF = filteredDF.reset_index()
-        filteredDF = filteredDF[filteredDF[0] < 365]
-
-        if not filteredDF.empty:
-            files_to_process.append(filename)
-
-    for filename in os.listdir(dest_path):
-        if filename[:-4]:
-            df = pd.read_csv(dest_path.joinpath(Path(filename[:-4] + ".csv")))
-
-            # There are very few missing values for the years 2008, 2014 and 2015 etc
-            # so we filled them based on the previous day's data
-            if filename in files_to_process:
-                df = df.fillna(method="ffill")
-
-            # For the stations with missing data throughout the year, we dropped them from the final dataframe
-            finalDF = df.dropna()
-
-            # Check for missing data
-            no_missing_values_in_weather = finalDF[weather].isnull().sum()
-            print(
-                f"The number of missing values in weather is: {no_missing_values_in_weather}"
+
+    # Check for missing data
+    value_column = value_column or weather
+    no_missing_values_in_weather = (
+        pd.read_parquet(dataset_path, columns=[value_column])[value_column].isnull().sum()
+    )
+    print(f"The number of missing values in weather is: {no_missing_values_in_weather}")
+    return dataset_path
+
+
+def temporary_stage_path(stage_path):
+    """
+    Get the directory a stage dataset is written to before it is moved to stage_path, removing
+    what an interrupted run left in it.
+
+    Parameters:
+    stage_path (Path): Output dataset of the stage.
+
+    Returns:
+    Path: The empty '<stage>.tmp' directory path next to stage_path.
+    """
+    tmp_path = Path(stage_path).with_name(f"{Path(stage_path).name}.tmp")
+    if os.path.exists(tmp_path):
+        print(f"Removing '{tmp_path}' left by an interrupted run")
+        shutil.rmtree(tmp_path)
+    return tmp_path
+
+
+def run_partitioned_stage(stage_path, stage, **kwargs):
+    """
+    Run a stage of the partitioned weather pipeline, unless its dataset was already written.
+
+    The stage writes to '<stage>.tmp', which is only moved to stage_path once the stage finished,
+    so a run killed mid-stage reruns the stage instead of skipping its partial dataset.
+
+    Parameters:
+    stage_path (Path): Output dataset of the stage.
+    stage (function): Pipeline function with an 'output_path' argument and the "partitioned" engine.
+    **kwargs: Other arguments of the stage function.
+
+    Returns:
+    pyarrow.dataset.Dataset: The dataset of the stage.
+    """
+    if os.path.exists(stage_path):
+        print(f"'{stage_path}' exists! Skipping {stage.__name__}")
+        return open_weather_dataset(stage_path)
+    start = time.time()
+    tmp_path = temporary_stage_path(stage_path)
+    stage(engine="partitioned", output_path=tmp_path, **kwargs)
+    os.replace(tmp_path, stage_path)
+    print(f"Time taken by {stage.__name__}: {time.time() - start}")
+    return open_weather_dataset(stage_path)
+
+
+def clip_data_partitioned(df, geo_df, engine="partitioned", output_path=None):
+    """
+    Clip a weather Parquet dataset to a map, one year at a time.
+
+    Parameters:
+    df (str, Path or pyarrow.dataset.Dataset): The weather dataset.
+    geo_df (geopandas.GeoDataFrame): The map to clip to.
+    engine (str): Only "partitioned", for run_partitioned_stage.
+    output_path (Path): Output dataset.
+
+    Returns:
+    pyarrow.dataset.Dataset: The clipped dataset.
+    """
+    dataset = open_weather_dataset(df)
+    for year in dataset_years(dataset):
+        clipped_df = clip_data(
+            df=read_dataset_year(dataset, year),
+            geo_df=geo_df,
+            epsg=4326,
+            method="sjoin",
+            add_geometry=False,
+        )
+        clipped_df["year"] = year
+        append_to_dataset(clipped_df, output_path, f"year-{year}")
+    return open_weather_dataset(output_path)
+
+
+def get_weather_data_partitioned(
+    nigeria_shape_df,
+    data_path_temperature,
+    data_path_precipitation,
+    output_path,
+    interpolate=False,
+    clip=False,
+):
+    """
+    Process temperature and precipitation Parquet datasets with the "partitioned" engine of the pipeline.
+
+    Every stage reads the dataset of the previous stage by year or spatial tile and writes its own dataset in
+    output_path, so the pipeline never holds the full history in memory and restarts from the last finished stage.
+
+    Parameters:
+    nigeria_shape_df (geopandas.GeoDataFrame): The Nigeria map.
+    data_path_temperature (str): Parquet dataset of the temperature data.
+    data_path_precipitation (str): Parquet dataset of the precipitation data.
+    output_path (str): Directory of the stage datasets.
+    interpolate (bool): Interpolate the temperature to the 0.1 degree grid of the map.
+    clip (bool): Clip the precipitation to the map.
+
+    Returns:
+    tuple: The temperature and precipitation datasets with all the climate indicators.
+    """
+    output_path = Path(output_path)
+    weather_temperature = open_weather_dataset(data_path_temperature)
+    weather_precipitation = open_weather_dataset(data_path_precipitation)
+
+    if interpolate:  # We only interpolate temperature
+        print("Started interpolation for temperature")
+        weather_temperature = run_partitioned_stage(
+            output_path.joinpath("temperature_interpolated"),
+            interpolate_data_for_all_dates,
+            df=weather_temperature,
+            geo_df=nigeria_shape_df,
+            value_col="temperature",
+            lat_res=0.1,
+            lon_res=0.1,
+            method="linear",
+            epsg=4326,
+        )
+
+    if clip:  # We only clip for precipitation here
+        print("Started clipping for precipitation")
+        weather_precipitation = run_partitioned_stage(
+            output_path.joinpath("precipitation_clipped"),
+            clip_data_partitioned,
+            df=weather_precipitation,
+            geo_df=nigeria_shape_df,
+        )
+
+    print("==== Started Heatwave =====")
+    weather_temperature = run_partitioned_stage(
+        output_path.joinpath("temperature_indicators"),
+        heatwave_heavy_rainfall_indicators,
+        data=weather_temperature,
+        event="temperature",
+        geo_columns=GEO_COLUMNS,
+        lazy=True,
+    )
+    weather_precipitation = run_partitioned_stage(
+        output_path.joinpath("precipitation_indicators"),
+        heatwave_heavy_rainfall_indicators,
+        data=weather_precipitation,
+        event="precipitation",
+        geo_columns=GEO_COLUMNS,
+        delta_param=15,
+        lazy=True,
+    )
+
+    print("========= Started SPI computation =========")
+    weather_precipitation = run_partitioned_stage(
+        output_path.joinpath("precipitation_spi"),
+        calculate_SPI,
+        df=weather_precipitation,
+    )
+
+    # Preprocess the weather data year by year before saving it
+    temperature_path = output_path.joinpath("temperature")
+    precipitation_path = output_path.joinpath("precipitation")
+    if os.path.exists(temperature_path) and os.path.exists(precipitation_path):
+        print(f"'{temperature_path}' and '{precipitation_path}' already exist!")
+    else:
+        temperature_tmp_path = temporary_stage_path(temperature_path)
+        precipitation_tmp_path = temporary_stage_path(precipitation_path)
+        for year in dataset_years(weather_precipitation):
+            weather_precipitation_df, weather_temperature_df = preprocess_weather_datasets(
+                read_dataset_year(weather_precipitation, year),
+                read_dataset_year(weather_temperature, year),
             )
+            append_to_dataset(weather_precipitation_df, precipitation_tmp_path, f"year-{year}")
+            append_to_dataset(weather_temperature_df, temperature_tmp_path, f"year-{year}")
 
-            print("The final df that is being saved as pkl is:")
-            print(finalDF.head())
+        # A run killed between the two moves below left only one of them, replace it as well
+        for tmp_path, dataset_path in [
+            (temperature_tmp_path, temperature_path),
+            (precipitation_tmp_path, precipitation_path),
+        ]:
+            if os.path.exists(dataset_path):
+                shutil.rmtree(dataset_path)
+            os.replace(tmp_path, dataset_path)
 
-            # Cleaned file
-            finalDF.to_pickle(dest_path.joinpath(Path(filename[:-4] + ".pkl")))
+    return open_weather_dataset(temperature_path), open_weather_dataset(precipitation_path)
 
 
 def get_weather_data(
@@ -88,6 +255,8 @@ def get_weather_data(
     data_path_precipitation: str = None,
     interpolate=False,
     clip=False,
+    engine="pandas",
+    output_path=PARTITIONED_WEATHER_PATH,
 ):
     """
     Fetches and processes weather data based on provided file paths.
@@ -101,8 +270,20 @@ def get_weather_data(
         Path to the Nigeria shapefile. If not provided, an attempt to source the data from the internet is made.
     data_path_temperature: str, optional
         Path to the file containing temperature data. If not provided, an attempt to source the data from the internet is made.
+        The "partitioned" engine reads a Parquet dataset with 'date', 'lat', 'lon' and 'temperature' columns,
+        e.g. written by preprocess_data with value_column="temperature".
     data_path_precipitation: str, optional
         Path to the file containing precipitation data. If not provided, an attempt to source the data from the internet is made.
+        The "partitioned" engine reads a Parquet dataset with 'date', 'lat', 'lon' and 'precipitation' columns,
+        e.g. written by preprocess_data with value_column="precipitation".
+    engine: str, optional
+        "pandas" reads the weather pickles and processes them in memory. "partitioned" reads the weather
+        data as Parquet datasets (see preprocess_data) and processes them by year or spatial tile, writing
+        every stage as a dataset in output_path. Default is "pandas".
+    output_path: str, optional
+        Directory of the stage datasets of the "partitioned" engine. Stages already in it are skipped,
+        stages interrupted mid-way are rerun.
+        Default is PARTITIONED_WEATHER_PATH.
 
     Returns:
     --------
@@ -120,6 +301,17 @@ def get_weather_data(
         print("Start sourcing the weather data")
         raise ValueError("Sourcing data from the internet currently not available")
 
+    elif engine == "partitioned":
+        nigeria_shape_df = read_shape_file(data_path=nigeria_shape_path)
+        weather_temperature_df, weather_precipitation_df = get_weather_data_partitioned(
+            nigeria_shape_df,
+            data_path_temperature,
+            data_path_precipitation,
+            output_path,
+            interpolate=interpolate,
+            clip=clip,
+        )
+
     else:
         # read nigeria shape file and weather data
         nigeria_shape_df = read_shape_file(data_path=nigeria_shape_path)
@@ -151,6 +343,8 @@ def get_weather_data(
                 df=weather_precipitation_df,
                 geo_df=nigeria_shape_df,
                 epsg=4326,
+                method="sjoin",
+                add_geometry=False,
             )
             print(f"Overal time taken by the clipping: {time.time()-start}")
 
@@ -6,11 +6,18 @@ import geopandas as gpd
 import pandas as pd
 import xarray as xr
 import streamlit as st
-import wget
 import os
 import pickle
-from typing import Any, List, Union, Dict, Tuple
-from .constants import GEO_COLUMNS
+from typing import Any, List, Optional, Union, Dict, Tuple
+from .constants import (
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_MANIFEST_NAME,
+    GEO_COLUMNS,
+    NIGERIA_SEASON_MONTHS,
+    OPEN_METEO_ARCHIVE_URL,
+    OPEN_METEO_CACHE_PATH,
+    OPEN_METEO_DAILY_VARIABLES,
+)
 import numpy as np
 from pathlib import Path
 from itertools import zip_longest
@@ -18,20 +25,47 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import requests
 import json
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import time
-
-
-# Sourcing the online data using wget
-def get_data(baseURL, destination_path, weather, year_start, year_end):
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Sourcing the online data, several years at once
+def get_data(
+    baseURL,
+    destination_path,
+    weather,
+    year_start,
+    year_end,
+    max_workers=4,
+    checksums=None,
+    retries=3,
+):
     """
     Download weather data files for a range of years from a given URL.
 
+    Years are downloaded in parallel. Interrupted downloads resume from their partial '.part'
+    file, and complete files recorded in the manifest of destination_path are skipped.
+
     Parameters:
     baseURL (str): Base URL of the weather data files.
     destination_path (str): Directory where downloaded files will be stored.
     weather (str): Type of weather data (e.g., "precip", "tmax", "tmin").
     year_start (int): Starting year of the range.
     year_end (int): Ending year of the range.
+    max_workers (int): Number of files downloaded at the same time. Default is 4.
+    checksums (dict): Optional expected SHA-256 checksum of the file of each year.
+    retries (int): Number of retries of a failed download, resuming where it stopped. Default is 3.
+
+    Returns:
+    list: Paths of the downloaded files, one per year.
     """
     print(
         f"Starting to get the data for {weather} from year {year_start} to {year_end} from the URL {baseURL}"
@@ -42,16 +76,171 @@ def get_data(baseURL, destination_path, weather, year_start, year_end):
     print(f"The destination_path is: {destination_path}")
     os.makedirs(destination_path, exist_ok=True)
 
-    for year in range(year_start, year_end + 1):
-        print(f"Get data for year {year}")
-        dataURL = baseURL + str(year) + ".nc"
-        print(type(destination_path))
+    if checksums is None:
+        checksums = {}
+    manifest_path = f"{destination_path}/{DOWNLOAD_MANIFEST_NAME}"
+    manifest = read_download_manifest(manifest_path)
+    manifest_lock = threading.Lock()
 
+    def _get_year(year):
+        dataURL = baseURL + str(year) + ".nc"
         file_path = f"{destination_path}/{weather}.{year}.nc"
-        print(f"The file_path is: {file_path}")
-        print(f"The URL for downloading the data is: {dataURL}")
+        file_name = os.path.basename(file_path)
+
+        if is_download_complete(file_path, manifest.get(file_name), checksums.get(year)):
+            print(f"Skipping year {year}, {file_path} is already complete")
+            return file_path
 
-        wget.download(dataURL, out=file_path)
+        print(f"Get data for year {year} from {dataURL}")
+        file_entry = download_file(
+            dataURL, file_path, expected_checksum=checksums.get(year), retries=retries
+        )
+        with manifest_lock:
+            manifest[file_name] = file_entry
+            write_download_manifest(manifest_path, manifest)
+        print(f"Downloaded year {year} to {file_path}")
+        return file_path
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_get_year, range(year_start, year_end + 1)))
+
+
+def read_download_manifest(manifest_path):
+    """
+    Read the manifest of the completely downloaded files of a directory.
+
+    Parameters:
+    manifest_path (str): Path of the manifest JSON file.
+
+    Returns:
+    dict: For every file name, its 'url', 'size' and 'sha256'. Empty if there is no manifest yet.
+    """
+    if not check_file_existence(manifest_path):
+        return {}
+    with open(manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+
+def write_download_manifest(manifest_path, manifest):
+    """
+    Write the manifest of the completely downloaded files of a directory, replacing it atomically.
+
+    Parameters:
+    manifest_path (str): Path of the manifest JSON file.
+    manifest (dict): For every file name, its 'url', 'size' and 'sha256'.
+    """
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def file_sha256(file_path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Compute the SHA-256 checksum of a file.
+
+    Parameters:
+    file_path (str): Path of the file.
+    chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+    str: The hexadecimal checksum.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_download_complete(file_path, manifest_entry, expected_checksum=None):
+    """
+    Check whether a file was completely downloaded, using its manifest entry.
+
+    Parameters:
+    file_path (str): Path of the downloaded file.
+    manifest_entry (dict): The 'size' and 'sha256' of the file in the manifest, None if not recorded.
+    expected_checksum (str): Optional expected SHA-256 checksum, checked against the manifest.
+
+    Returns:
+    bool: True if the file exists with the size recorded in the manifest (and the expected checksum).
+    """
+    if manifest_entry is None or not check_file_existence(file_path):
+        return False
+    if os.path.getsize(file_path) != manifest_entry["size"]:
+        return False
+    return expected_checksum is None or expected_checksum == manifest_entry["sha256"]
+
+
+def download_file(url, file_path, expected_checksum=None, retries=3, timeout=60):
+    """
+    Download a file, resuming a previous partial download with an HTTP Range request.
+
+    The data is written to '<file_path>.part' and moved to file_path once its size and
+    checksum are verified. A partial file the server rejects as out of range is only kept
+    if the server reports exactly its size, otherwise it is deleted and the download restarts.
+
+    Parameters:
+    url (str): URL of the file.
+    file_path (str): Destination path of the file.
+    expected_checksum (str): Optional expected SHA-256 checksum of the file.
+    retries (int): Number of retries of a failed download, resuming where it stopped. Default is 3.
+    timeout (float): Timeout of the connection and of each read, in seconds. Default is 60.
+
+    Returns:
+    dict: The 'url', 'size' and 'sha256' of the downloaded file, for the manifest.
+
+    Raises:
+    ValueError: If the downloaded file does not have the expected size or checksum, or if the partial
+    file kept mismatching the server file on every attempt.
+    """
+    part_path = f"{file_path}.part"
+
+    for attempt in range(retries + 1):
+        offset = os.path.getsize(part_path) if check_file_existence(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416:
+                    if response.headers.get("Content-Range") != f"bytes */{offset}":
+                        # The partial file is not a prefix of the file on the server, start over
+                        print(f"Partial download of {url} does not match the server file, restarting")
+                        os.remove(part_path)
+                        continue
+                    # The partial file already holds the whole file
+                    total_size = offset
+                else:
+                    response.raise_for_status()
+                    if response.status_code == 206:
+                        total_size = int(response.headers["Content-Range"].split("/")[-1])
+                        mode = "ab"
+                    else:
+                        # The server ignored the range, start over
+                        offset = 0
+                        total_size = int(response.headers.get("Content-Length", -1))
+                        mode = "wb"
+                    with open(part_path, mode) as part_file:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            part_file.write(chunk)
+            break
+        except requests.exceptions.RequestException as e:
+            if attempt == retries:
+                raise
+            print(f"Download of {url} failed ({e}), resuming (attempt {attempt + 2}/{retries + 1})")
+            time.sleep(2**attempt)
+    else:
+        raise ValueError(f"Could not download {url} in {retries + 1} attempts")
+
+    size = os.path.getsize(part_path)
+    if total_size >= 0 and size != total_size:
+        raise ValueError(f"Incomplete download of {url}: {size} of {total_size} bytes")
+    sha256 = file_sha256(part_path)
+    if expected_checksum is not None and sha256 != expected_checksum:
+        os.remove(part_path)
+        raise ValueError(f"Checksum mismatch for {url}: {sha256} != {expected_checksum}")
+
+    os.replace(part_path, file_path)
+    return {"url": url, "size": size, "sha256": sha256}
 
 
 def ncToCSV(filepath, destination_path, coordinate_limits):
@@ -82,6 +271,64 @@ def ncToCSV(filepath, destination_path, coordinate_limits):
     print(f"Exported to {destination_path}")
 
 
+def ncToParquet(filepath, destination_path, coordinate_limits, weather, value_column=None):
+    """
+    Convert a NetCDF file to a Parquet dataset partitioned by year, keeping only the coordinate limits.
+
+    The file is opened lazily and sliced to the bounding box before any value is loaded. Missing
+    values of a location are filled from its previous day, and locations missing on all days are dropped.
+    The dataset has the 'date', 'lat', 'lon' and value columns the weather pipeline reads.
+
+    Parameters:
+    filepath (Path): Path to the input NetCDF file.
+    destination_path (Path): Directory of the Parquet dataset, one 'year=<year>' partition per year.
+    coordinate_limits (list): List of latitude and longitude coordinate limits.
+    weather (str): Name of the weather variable in the NetCDF file (e.g., "precip", "tmax").
+    value_column (str): Name of the value column in the dataset (e.g., "precipitation"). Default is weather.
+
+    Returns:
+    int: The number of rows written.
+
+    Notes:
+    This function assumes that the NetCDF file has 'time', 'lat' and 'lon' dimensions.
+    """
+    lat_min, lat_max, lon_min, lon_max = coordinate_limits
+
+    with xr.open_dataset(filepath) as ds:
+        # Slice in the order of the coordinates, latitudes are often stored descending
+        lat_slice = slice(lat_min, lat_max) if ds["lat"][0] <= ds["lat"][-1] else slice(lat_max, lat_min)
+        lon_slice = slice(lon_min, lon_max) if ds["lon"][0] <= ds["lon"][-1] else slice(lon_max, lon_min)
+        da = ds[weather].sel(lat=lat_slice, lon=lon_slice).transpose("time", "lat", "lon").load()
+
+    # There are very few missing values for the years 2008, 2014 and 2015 etc
+    # so we fill them based on the previous day's data
+    values = da.values
+    last_valid_day = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None, None])
+    np.maximum.accumulate(last_valid_day, axis=0, out=last_valid_day)
+    da = da.copy(data=np.take_along_axis(values, last_valid_day, axis=0).astype("float32"))
+
+    value_column = value_column or weather
+    df = da.to_dataframe(name=value_column).reset_index()[["time", "lat", "lon", value_column]]
+    df.rename(columns={"time": "date"}, inplace=True)
+
+    # For the stations with missing data throughout the year, we drop them from the final dataframe
+    df = df.dropna(subset=[value_column])
+    df["year"] = df["date"].dt.year.astype("int16")
+
+    pq.write_to_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        root_path=str(destination_path),
+        partition_cols=["year"],
+        compression="zstd",
+        # Files are named after the NetCDF file, so a rerun overwrites its own files and leaves the
+        # files other NetCDF files wrote to the same year partition in place
+        basename_template=f"{Path(filepath).stem}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    print(f"Exported {len(df)} rows of {filepath} to {destination_path}")
+    return len(df)
+
+
 def get_correlation_matrix(df, col_index, col_columns, col_values):
     """
     Performs correlation analysis on a given dataframe.
@@ -375,6 +622,129 @@ def compute_years_daily_averaging_threshold_per_grid(
     return geo_years_daily_rolling_averages
 
 
+def compute_daily_averaging_thresholds_cube(
+    data: pd.DataFrame, event: str, geo_columns: list, window: int
+) -> Tuple[Dict[str, List[float]], np.ndarray]:
+    """
+    Compute the rolling daily averages of an event per grid coordinate from a (grid, year, day) cube.
+
+    Same result as compute_years_daily_averaging_threshold_per_grid, computed with a single sort
+    instead of one boolean mask per grid coordinate and year. The values are placed in a
+    (grid, year, 366) array by their position within the year, the centered rolling window is
+    applied along the day axis and the years are averaged per day.
+
+    Parameters:
+        data (pd.DataFrame): The DataFrame containing the weather event data.
+        event (str): The name of the weather event column.
+        geo_columns (list): List of columns representing the grid coordinates.
+        window (int): The rolling window size.
+
+    Returns:
+        Tuple[Dict[str, List[float]], np.ndarray]: The rolling daily averages per grid coordinate
+        in the format of compute_years_daily_averaging_threshold_per_grid, and the same values as a
+        dense (n_grid, 366) array whose rows follow the key order of the dictionary.
+    """
+    grid_ids, grid_keys = grid_index(data, geo_columns)
+    year_values, year_ids = np.unique(data["date"].dt.year.to_numpy(), return_inverse=True)
+
+    # Stable sort keeps the row order of the days within each grid coordinate and year
+    order = np.lexsort((year_ids, grid_ids))
+    grid_ids, year_ids = grid_ids[order], year_ids[order]
+    values = data[event].to_numpy(dtype=float)[order]
+
+    # Position of every day within its grid coordinate and year
+    group_starts = np.ones(len(order), dtype=bool)
+    group_starts[1:] = (grid_ids[1:] != grid_ids[:-1]) | (year_ids[1:] != year_ids[:-1])
+    start_positions = np.flatnonzero(group_starts)
+    positions = np.arange(len(order)) - np.repeat(
+        start_positions, np.diff(np.append(start_positions, len(order)))
+    )
+
+    n_grid, n_years = len(grid_keys), len(year_values)
+    n_days = max(366, positions.max() + 1)
+    cube = np.full((n_grid, n_years, n_days), np.nan)
+    cube[grid_ids, year_ids, positions] = values
+
+    # Centered rolling mean along the day axis, ignoring missing values (min_periods=1)
+    window_sum, window_count = np.zeros(cube.shape), np.zeros(cube.shape)
+    for offset in range(-(window // 2), window - window // 2):
+        if offset >= 0:
+            neighbours, days = cube[:, :, offset:], slice(0, n_days - offset)
+        else:
+            neighbours, days = cube[:, :, :offset], slice(-offset, n_days)
+        present = ~np.isnan(neighbours)
+        window_sum[:, :, days] += np.where(present, neighbours, 0)
+        window_count[:, :, days] += present
+    with np.errstate(invalid="ignore"):
+        rolling_means = np.nan_to_num(window_sum / window_count)
+
+    # Days past the end of a shorter year count as 0 up to the longest year of that grid coordinate,
+    # years without data for a grid coordinate are left out of its average
+    year_lengths = np.zeros((n_grid, n_years), dtype=int)
+    np.maximum.at(year_lengths, (grid_ids, year_ids), positions + 1)
+    grid_lengths = year_lengths.max(axis=1)
+
+    rolling_means[np.arange(n_days) >= year_lengths[:, :, None]] = 0
+    rolling_means[year_lengths == 0] = np.nan
+    thresholds = np.nanmean(rolling_means, axis=1)
+    thresholds[np.arange(n_days) >= grid_lengths[:, None]] = np.nan
+
+    geo_years_daily_rolling_averages = {
+        grid_key: thresholds[grid_id, : grid_lengths[grid_id]].tolist()
+        for grid_id, grid_key in enumerate(grid_keys)
+    }
+    return geo_years_daily_rolling_averages, thresholds
+
+
+def grid_index(
+    data: pd.DataFrame, geo_columns: List[str]
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Map the grid coordinate pair of every row to an integer grid id.
+
+    Parameters:
+        data (pd.DataFrame): The DataFrame containing the grid coordinate columns.
+        geo_columns (List[str]): List of columns representing the grid coordinates (longitude, latitude).
+
+    Returns:
+        Tuple[np.ndarray, List[str]]: The grid id of every row and, for every grid id,
+        its threshold key formatted as "{longitude}-{latitude}".
+    """
+    longitude_column, latitude_column = geo_columns
+    longitude_ids, longitudes = pd.factorize(data[longitude_column], use_na_sentinel=False)
+    latitude_ids, latitudes = pd.factorize(data[latitude_column], use_na_sentinel=False)
+
+    # Combine both coordinate ids into one pair id, numbered by first appearance
+    grid_ids, paired_ids = pd.factorize(longitude_ids * len(latitudes) + latitude_ids)
+    grid_keys = [
+        f"{longitudes[paired_id // len(latitudes)]}-{latitudes[paired_id % len(latitudes)]}"
+        for paired_id in paired_ids
+    ]
+    return grid_ids, grid_keys
+
+
+def daily_thresholds_to_array(
+    daily_thresholds: Dict[str, List[float]], grid_keys: List[str], n_days: int = 366
+) -> np.ndarray:
+    """
+    Stack the daily thresholds of the given grid keys into a dense (n_grid, n_days) array.
+
+    Parameters:
+        daily_thresholds (Dict[str, List[float]]): Daily threshold values indexed by grid key.
+        grid_keys (List[str]): Grid keys in grid id order, as returned by grid_index.
+        n_days (int, optional): Number of days per year. Defaults to 366.
+
+    Returns:
+        np.ndarray: Array where row i holds the daily thresholds of grid_keys[i].
+        Days without a threshold are NaN.
+    """
+    thresholds = np.full((len(grid_keys), n_days), np.nan)
+    for grid_id, grid_key in enumerate(grid_keys):
+        grid_thresholds = daily_thresholds[grid_key][:n_days]
+        thresholds[grid_id, : len(grid_thresholds)] = grid_thresholds
+    return thresholds
+
+
 def severity_measure(data: Dict[int, float], days_param: int = 3) -> Dict[int, float]:
     """
     Calculate severity measure for consecutive positive values.
@@ -541,6 +911,143 @@ def compute_severity_ranking(data: pd.DataFrame, event: str, days_param: int = 3
         ] = year_severity_ranking[["severity", "ranking"]]
 
 
+def run_length_severity(
+    grid_ids: np.ndarray,
+    years: np.ndarray,
+    days: np.ndarray,
+    delta: np.ndarray,
+    days_param: int = 3,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute severity and ranking for extreme days of all grid cells and years at once.
+
+    Runs of consecutive positive days per grid cell and year are found with a single
+    sort by (grid, year, day). Each day of a run at least days_param long gets the same
+    severity severity_measure assigns when the days of a grid cell come in ascending order:
+    the sum of the deltas from that day, or from the start of the last days_param days,
+    up to the end of the run. Days of shorter runs get 1.0 and non-positive days get 0.
+
+    Parameters:
+        grid_ids (np.ndarray): Integer grid id of every extreme day.
+        years (np.ndarray): Year of every extreme day.
+        days (np.ndarray): Day of the year of every extreme day.
+        delta (np.ndarray): Delta of every extreme day.
+        days_param (int): The minimum number of consecutive positive days to calculate the severity. Defaults to 3.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Severity and ranking of every extreme day, in input order.
+    """
+    order = np.lexsort((days, years, grid_ids))
+    grid_ids, years, days = grid_ids[order], years[order], days[order]
+    delta = np.asarray(delta, dtype=float)[order]
+    n_rows = len(order)
+
+    # A day continues the run of the previous day if both are positive and consecutive in the same grid cell and year
+    positive = delta > 0
+    continues_run = np.zeros(n_rows, dtype=bool)
+    continues_run[1:] = (
+        positive[1:]
+        & positive[:-1]
+        & (grid_ids[1:] == grid_ids[:-1])
+        & (years[1:] == years[:-1])
+        & (days[1:] == days[:-1] + 1)
+    )
+    run_ids = np.cumsum(~continues_run) - 1
+    run_starts = np.flatnonzero(~continues_run)
+    run_lengths = np.diff(np.append(run_starts, n_rows))
+    run_ends = (run_starts + run_lengths - 1)[run_ids]
+
+    # severity_measure only checks the run length once a second day is added
+    min_run_length = max(days_param, 2)
+    severe = positive & (run_lengths[run_ids] >= min_run_length)
+    positions = np.arange(n_rows)
+    sum_starts = np.minimum(positions, run_ends - min_run_length + 1)
+
+    # Sum each needed start up to its run end, adding left to right like severity_measure
+    needed_starts = np.flatnonzero(severe & (positions == sum_starts))
+    run_sums = np.full(n_rows, np.nan)
+    run_sums[needed_starts] = delta[needed_starts]
+    cursor, active = needed_starts + 1, needed_starts
+    while active.size:
+        still_running = cursor <= run_ends[active]
+        active, cursor = active[still_running], cursor[still_running]
+        run_sums[active] += delta[cursor]
+        cursor = cursor + 1
+
+    severity = np.ones(n_rows)
+    severity[delta <= 0] = 0
+    severity[severe] = run_sums[sum_starts[severe]]
+    ranking = np.where(severity > 1, 2, 1)
+
+    # Scatter back to the input order
+    severity_values, ranking_values = np.empty(n_rows), np.empty(n_rows, dtype=int)
+    severity_values[order], ranking_values[order] = severity, ranking
+    return severity_values, ranking_values
+
+
+def grouped_rolling_mean(
+    values: np.ndarray, group_sizes: np.ndarray, window: int
+) -> np.ndarray:
+    """
+    Trailing rolling mean (min_periods=1) that restarts at every group of a contiguous array.
+
+    Window sums are the difference of two cumulative sums, so the cost does not depend on the window size.
+    Missing values are skipped like pandas' rolling mean does.
+
+    Parameters:
+        values (np.ndarray): Values sorted so that each group is a contiguous slice in time order.
+        group_sizes (np.ndarray): Number of values of each group, in slice order.
+        window (int): The rolling window size.
+
+    Returns:
+        np.ndarray: The rolling mean of every value, NaN where its window holds no values.
+    """
+    present = ~np.isnan(values)
+    cumulative_sums = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0))])
+    cumulative_counts = np.concatenate([[0], np.cumsum(present)])
+
+    positions = np.arange(len(values))
+    group_starts = np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes)
+    window_starts = np.maximum(positions - window + 1, group_starts)
+
+    window_sums = cumulative_sums[positions + 1] - cumulative_sums[window_starts]
+    window_counts = cumulative_counts[positions + 1] - cumulative_counts[window_starts]
+    with np.errstate(invalid="ignore"):
+        return window_sums / window_counts
+
+
+def compute_severity_ranking_run_length(
+    data: pd.DataFrame, event: str, days_param: int = 3
+):
+    """
+    Compute severity and ranking measures for extreme weather events with run-length encoding.
+
+    Produces the same values as compute_severity_ranking for data whose days are in
+    ascending order per grid cell, without looping over grid cells and years.
+
+    Parameters:
+        data (pd.DataFrame): The input DataFrame containing weather event data.
+        event (str): The name of the weather event column.
+        days_param (int, optional): Parameter for computing severity. Default is 3.
+
+    Returns:
+        None
+    """
+    extreme_rows = data["severity"].isna().to_numpy()
+    extreme_data = data.loc[extreme_rows, GEO_COLUMNS + ["year", "day", "delta"]]
+    grid_ids, _ = grid_index(extreme_data, GEO_COLUMNS)
+
+    severity, ranking = run_length_severity(
+        grid_ids,
+        extreme_data["year"].to_numpy(),
+        extreme_data["day"].to_numpy(),
+        extreme_data["delta"].to_numpy(),
+        days_param,
+    )
+    data.loc[extreme_rows, "severity"] = severity
+    data.loc[extreme_rows, "ranking"] = ranking
+
+
 def batching(container: List, batch_size: int) -> List[List]:
     """
     Split a container into batches of a specified size.
@@ -559,6 +1066,285 @@ def batching(container: List, batch_size: int) -> List[List]:
     return batches
 
 
+def batch_size_from_memory_budget(
+    data: pd.DataFrame, memory_budget_gb: float, memory_factor: float = 4.0
+) -> int:
+    """
+    Pick the number of years per batch that fits a memory budget.
+
+    Parameters:
+        data (pd.DataFrame): The DataFrame to process in year batches, with a 'year' column.
+        memory_budget_gb (float): Memory available for one batch, in GB.
+        memory_factor (float): Ratio between the peak memory of a batch while computing its
+            features and the memory of its input rows. Default is 4.0.
+
+    Returns:
+        int: The number of years per batch, at least 1.
+    """
+    n_years = data["year"].nunique()
+    year_bytes = data.memory_usage(deep=True).sum() / max(n_years, 1)
+    batch_size = int(memory_budget_gb * 1024**3 // (year_bytes * memory_factor))
+    return max(batch_size, 1)
+
+
+def open_weather_dataset(source: Union[str, Path, Any]):
+    """
+    Open a Parquet weather dataset (a file or a directory, optionally partitioned by 'year=<year>') lazily.
+
+    Parameters:
+        source (str, Path or pyarrow.dataset.Dataset): The dataset location, or an already opened dataset.
+
+    Returns:
+        pyarrow.dataset.Dataset: The dataset, nothing is read yet.
+    """
+    if isinstance(source, ds.Dataset):
+        return source
+    return ds.dataset(str(source), format="parquet", partitioning="hive")
+
+
+def dataset_to_pandas(table: pa.Table) -> pd.DataFrame:
+    """
+    Convert a table read from a weather dataset to pandas, with an integer 'year' column.
+
+    Parameters:
+        table (pyarrow.Table): Table read from a dataset, see open_weather_dataset().
+
+    Returns:
+        pd.DataFrame: The table as a DataFrame. A 'year' partition column becomes int32 instead of categorical.
+    """
+    data = table.to_pandas()
+    if "year" in data.columns:
+        data["year"] = data["year"].astype("int32")
+    return data
+
+
+def dataset_years(dataset, date_column: str = "date") -> List[int]:
+    """
+    Find the years of a weather dataset, reading only its date column batch by batch.
+
+    Parameters:
+        dataset (pyarrow.dataset.Dataset): The weather dataset.
+        date_column (str): The date column. Default is 'date'.
+
+    Returns:
+        List[int]: The sorted years of the dataset.
+    """
+    years = set()
+    for batch in dataset.to_batches(columns=[date_column]):
+        years.update(pc.unique(pc.year(batch.column(0))).to_pylist())
+    return sorted(year for year in years if year is not None)
+
+
+def read_dataset_year(dataset, year: int, date_column: str = "date") -> pd.DataFrame:
+    """
+    Read the rows of one year of a weather dataset.
+
+    Parameters:
+        dataset (pyarrow.dataset.Dataset): The weather dataset.
+        year (int): The year to read.
+        date_column (str): The date column. Default is 'date'.
+
+    Returns:
+        pd.DataFrame: The rows of the year.
+    """
+    year_filter = (ds.field(date_column) >= pd.Timestamp(year, 1, 1)) & (
+        ds.field(date_column) < pd.Timestamp(year + 1, 1, 1)
+    )
+    return dataset_to_pandas(dataset.to_table(filter=year_filter))
+
+
+def dataset_spatial_tiles(dataset, tile_size: float = 2.0) -> List[Tuple[float, float, float, float]]:
+    """
+    Split the grid of a weather dataset in square tiles, reading only its lon/lat columns batch by batch.
+
+    Parameters:
+        dataset (pyarrow.dataset.Dataset): The weather dataset, with 'lon' and 'lat' columns.
+        tile_size (float): Width and height of the tiles in degrees. Default is 2.0.
+
+    Returns:
+        List[Tuple[float, float, float, float]]: (lon_min, lon_max, lat_min, lat_max) of the tiles holding
+        grid points, with lon_min <= lon < lon_max and lat_min <= lat < lat_max.
+    """
+    lons, lats, tiles = set(), set(), set()
+    for batch in dataset.to_batches(columns=["lon", "lat"]):
+        batch_lons = batch.column(0).to_numpy(zero_copy_only=False)
+        batch_lats = batch.column(1).to_numpy(zero_copy_only=False)
+        lons.update(np.unique(batch_lons))
+        lats.update(np.unique(batch_lats))
+        tiles.update(
+            zip(*np.unique(np.floor(np.stack([batch_lons, batch_lats]) / tile_size), axis=1))
+        )
+
+    # Bound every tile by the coordinates it holds, so no grid point falls between two tiles
+    bounds = []
+    for coordinates in [lons, lats]:
+        coordinates = np.array(sorted(coordinates))
+        tile_ids, first_coordinates = np.unique(
+            np.floor(coordinates / tile_size), return_index=True
+        )
+        lower_bounds = coordinates[first_coordinates]
+        upper_bounds = np.append(lower_bounds[1:], np.inf)
+        bounds.append(dict(zip(tile_ids, zip(lower_bounds, upper_bounds))))
+    lon_bounds, lat_bounds = bounds
+
+    return [
+        (*lon_bounds[tile_lon], *lat_bounds[tile_lat]) for tile_lon, tile_lat in sorted(tiles)
+    ]
+
+
+def read_dataset_tile(dataset, tile: Tuple[float, float, float, float]) -> pd.DataFrame:
+    """
+    Read the rows of one spatial tile of a weather dataset.
+
+    Parameters:
+        dataset (pyarrow.dataset.Dataset): The weather dataset, with 'lon' and 'lat' columns.
+        tile (Tuple[float, float, float, float]): (lon_min, lon_max, lat_min, lat_max), see dataset_spatial_tiles().
+
+    Returns:
+        pd.DataFrame: The rows of the tile.
+    """
+    lon_min, lon_max, lat_min, lat_max = tile
+    tile_filter = (
+        (ds.field("lon") >= lon_min)
+        & (ds.field("lon") < lon_max)
+        & (ds.field("lat") >= lat_min)
+        & (ds.field("lat") < lat_max)
+    )
+    return dataset_to_pandas(dataset.to_table(filter=tile_filter))
+
+
+def append_to_dataset(data: pd.DataFrame, output_path: Union[str, Path], part_name: str):
+    """
+    Append a DataFrame to a Parquet weather dataset partitioned by year.
+
+    Parameters:
+        data (pd.DataFrame): The rows to append, with a 'year' column.
+        output_path (str or Path): Directory of the dataset.
+        part_name (str): Name of the appended files, unique within the dataset (e.g. the tile or the year).
+    """
+    pq.write_to_dataset(
+        pa.Table.from_pandas(data, preserve_index=False),
+        root_path=str(output_path),
+        partition_cols=["year"],
+        basename_template=f"{part_name}-{{i}}.parquet",
+    )
+
+
+def _any_of(expressions):
+    """
+    Combine pyarrow expressions with OR, or return None for no expressions.
+    """
+    combined = None
+    for expression in expressions:
+        combined = expression if combined is None else combined | expression
+    return combined
+
+
+def weather_query_filter(
+    schema: pa.Schema,
+    year: Optional[Union[int, List[int]]] = None,
+    month: Optional[Union[int, List[int]]] = None,
+    season: Optional[str] = None,
+    date_column: str = "date",
+):
+    """
+    Build the pyarrow filter of a year/month/season selection of weather data.
+
+    Years and months are compared to the 'year' and 'month' columns when the data has them, else to the
+    date column. Plain comparisons let the Parquet reader skip the row groups and partitions outside the
+    selection from their statistics.
+
+    Parameters:
+        schema (pyarrow.Schema): Schema of the weather data.
+        year (int or list of int, optional): Years to keep. Default is None, keeping all years.
+        month (int or list of int, optional): Months to keep. Default is None, keeping all months.
+        season (str, optional): "Wet" or "Dry" season to keep, see NIGERIA_SEASON_MONTHS. Default is None.
+        date_column (str): The date column. Default is 'date'.
+
+    Returns:
+        pyarrow.dataset.Expression or None: The filter, None when nothing is selected.
+    """
+    if season is not None and season not in NIGERIA_SEASON_MONTHS:
+        raise ValueError(f"Unknown season {season}, use one of {list(NIGERIA_SEASON_MONTHS)}")
+
+    years = [year] if isinstance(year, (int, np.integer)) else year
+    months = [month] if isinstance(month, (int, np.integer)) else month
+    if season is not None:
+        season_months = NIGERIA_SEASON_MONTHS[season]
+        months = season_months if months is None else [m for m in months if m in season_months]
+
+    if (years is not None and len(years) == 0) or (months is not None and len(months) == 0):
+        return pc.scalar(False)
+
+    expressions = []
+    if years is not None:
+        if "year" in schema.names:
+            expressions.append(_any_of(ds.field("year") == int(y) for y in years))
+        else:
+            expressions.append(
+                _any_of(
+                    (ds.field(date_column) >= pd.Timestamp(int(y), 1, 1))
+                    & (ds.field(date_column) < pd.Timestamp(int(y) + 1, 1, 1))
+                    for y in years
+                )
+            )
+    if months is not None:
+        if "month" in schema.names:
+            expressions.append(_any_of(ds.field("month") == int(m) for m in months))
+        else:
+            expressions.append(
+                pc.is_in(pc.month(ds.field(date_column)), pa.array([int(m) for m in months], pa.int64()))
+            )
+
+    filter_expression = None
+    for expression in expressions:
+        filter_expression = expression if filter_expression is None else filter_expression & expression
+    return filter_expression
+
+
+def query_weather(
+    source,
+    year: Optional[Union[int, List[int]]] = None,
+    month: Optional[Union[int, List[int]]] = None,
+    season: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    filters=None,
+) -> pd.DataFrame:
+    """
+    Read only a year/month/season slice of a Parquet weather file or dataset.
+
+    The selection is pushed down to the Parquet reader (see weather_query_filter), so the rest of the
+    data is never read or converted to pandas.
+
+    Parameters:
+        source (str, Path, file-like or pyarrow.dataset.Dataset): The weather data.
+        year (int or list of int, optional): Years to keep. Default is None, keeping all years.
+        month (int or list of int, optional): Months to keep. Default is None, keeping all months.
+        season (str, optional): "Wet" or "Dry" season to keep. Default is None.
+        columns (list of str, optional): Columns to read. Default is None, reading all columns.
+        filters (pyarrow.dataset.Expression, optional): Additional filter on other columns. Default is None.
+
+    Returns:
+        pd.DataFrame: The rows of the selection.
+    """
+    if isinstance(source, ds.Dataset):
+        schema = source.schema
+    else:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        schema = pq.read_schema(source)
+
+    filter_expression = weather_query_filter(schema, year=year, month=month, season=season)
+    if filters is not None:
+        filter_expression = filters if filter_expression is None else filter_expression & filters
+
+    if isinstance(source, ds.Dataset):
+        table = source.to_table(columns=columns, filter=filter_expression)
+    else:
+        table = pq.read_table(source, columns=columns, filters=filter_expression)
+    return dataset_to_pandas(table)
+
+
 def plot_heatmap(
     matrix,
     title,
@@ -615,7 +1401,12 @@ def batching(list_of_elements: List, batch_size: int) -> List[List]:
 
 
 def get_weather_data_open_meteo(
-    latitude: float, longitude: float, start: str, end: str = None
+    latitude: float,
+    longitude: float,
+    start: str,
+    end: str = None,
+    session: Optional[requests.Session] = None,
+    base_url: str = OPEN_METEO_ARCHIVE_URL,
 ) -> pd.DataFrame:
     """
     Fetches weather data from the Open-Meteo API for a specified location and time range.
@@ -630,6 +1421,8 @@ def get_weather_data_open_meteo(
         longitude (float): The longitude of the location for weather data retrieval.
         start (str): The start date of the data range in 'YYYY-MM-DD' format.
         end (str)(optional): The end date of the data range in 'YYYY-MM-DD' format.
+        session (requests.Session)(optional): Session used for the request, see open_meteo_session().
+        base_url (str)(optional): URL of the Open-Meteo archive API. Default is OPEN_METEO_ARCHIVE_URL.
 
     Returns:
         pd.DataFrame: A DataFrame containing processed weather data with columns for:
@@ -638,75 +1431,248 @@ def get_weather_data_open_meteo(
             - temperature_2m_min (float): Minimum 2-meter temperature in Celsius.
             - temperature_2m_mean (float): Mean 2-meter temperature in Celsius.
             - precipitation_sum (float): Total daily precipitation in millimeters.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
     """
     # Get data for only one day
     if end is None:
         end = start
 
-    link = f"https://archive-api.open-meteo.com/v1/archive?latitude={latitude}&longitude={longitude}&start_date={start}&end_date={end}&daily=temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum&timezone=auto"
+    weather_data = request_open_meteo(
+        session if session is not None else requests,
+        base_url,
+        latitude,
+        longitude,
+        str(start),
+        str(end),
+    )
+    return open_meteo_to_dataframe(weather_data)
+
+
+def request_open_meteo(
+    session: Union[requests.Session, Any],
+    base_url: str,
+    latitude: float,
+    longitude: float,
+    start: str,
+    end: str,
+    timeout: float = 30,
+) -> Dict[str, Any]:
+    """
+    Request the daily weather of one location and date range from the Open-Meteo API.
 
-    try:
-        # Fetch weather data from the provided link
-        response = requests.get(link, timeout=5)
-        weather_data = response.json()
+    Parameters:
+        session (requests.Session): Session (or the requests module) used for the request.
+        base_url (str): URL of the Open-Meteo archive API.
+        latitude (float): The latitude of the location.
+        longitude (float): The longitude of the location.
+        start (str): The start date of the data range in 'YYYY-MM-DD' format.
+        end (str): The end date of the data range in 'YYYY-MM-DD' format.
+        timeout (float): Timeout of the request in seconds. Default is 30.
+
+    Returns:
+        Dict[str, Any]: The JSON response of the API.
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_date": start,
+        "end_date": end,
+        "daily": ",".join(OPEN_METEO_DAILY_VARIABLES),
+        "timezone": "auto",
+    }
+    response = session.get(base_url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def open_meteo_to_dataframe(weather_data: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Convert an Open-Meteo API response to a DataFrame of daily weather.
 
-        # Create an empty DataFrame to store the processed data
-        combined_df = pd.DataFrame()
+    Parameters:
+        weather_data (Dict[str, Any]): The JSON response of the API.
+
+    Returns:
+        pd.DataFrame: Daily weather with 'lat', 'lon', 'date' and the daily variables columns.
+    """
+    combined_df = pd.DataFrame(weather_data["daily"])
+
+    # Rename the 'time' column to 'date'
+    combined_df.rename(columns={"time": "date"}, inplace=True)
+    combined_df.insert(0, "lat", weather_data["latitude"], True)
+    combined_df.insert(1, "lon", weather_data["longitude"], True)
+    return combined_df
+
+
+def open_meteo_session(
+    max_workers: int = 8, retries: int = 5, backoff_factor: float = 1.0
+) -> requests.Session:
+    """
+    Create a pooled requests session that retries failed Open-Meteo requests with exponential backoff.
 
-        # Iterate through each data point and add it to the DataFrame
-        for key, value in weather_data["daily"].items():
-            combined_df[key] = value
+    Parameters:
+        max_workers (int): Number of concurrent connections to keep in the pool. Default is 8.
+        retries (int): Number of retries on connection errors, 429 and 5xx responses. Default is 5.
+        backoff_factor (float): Backoff factor between retries, in seconds. Default is 1.0.
 
-        # Rename the 'time' column to 'date'
-        combined_df.rename(columns={"time": "date"}, inplace=True)
-        combined_df.insert(0, "lat", weather_data["latitude"], True)
-        combined_df.insert(1, "lon", weather_data["longitude"], True)
+    Returns:
+        requests.Session: The configured session.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=max_workers, pool_maxsize=max_workers)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_open_meteo_locations(
+    locations: pd.DataFrame,
+    max_workers: int = 8,
+    requests_per_second: Optional[float] = 5,
+    retries: int = 5,
+    backoff_factor: float = 1.0,
+    cache_path: Optional[Union[str, Path]] = OPEN_METEO_CACHE_PATH,
+    base_url: str = OPEN_METEO_ARCHIVE_URL,
+) -> List[pd.DataFrame]:
+    """
+    Fetch the daily weather of many locations from the Open-Meteo API, one request per location.
 
-        return combined_df
+    The requests run concurrently over a pooled session, are spaced to respect requests_per_second,
+    and their responses are cached on disk, keyed by location and date range.
 
-    except requests.exceptions.RequestException as e:
-        raise SystemExit(e)
+    Parameters:
+        locations (pd.DataFrame): One row per request with 'lat', 'lon', 'start' and 'end' ('YYYY-MM-DD') columns.
+        max_workers (int): Number of concurrent requests. Default is 8.
+        requests_per_second (float): Maximum number of requests started per second, None for no limit. Default is 5.
+        retries (int): Number of retries of a failed request. Default is 5.
+        backoff_factor (float): Backoff factor between retries, in seconds. Default is 1.0.
+        cache_path (str or Path): Directory of the cached responses, None to disable the cache.
+                                  Default is OPEN_METEO_CACHE_PATH.
+        base_url (str): URL of the Open-Meteo archive API. Default is OPEN_METEO_ARCHIVE_URL.
 
+    Returns:
+        List[pd.DataFrame]: The daily weather of every location, in the order of locations.
+    """
+    session = open_meteo_session(max_workers, retries, backoff_factor)
+    rate_lock = threading.Lock()
+    next_request_time = [time.monotonic()]
 
-def get_weather_for_household(hh_data: pd.DataFrame) -> pd.DataFrame:
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_path, exist_ok=True)
+        except OSError:
+            print(f"Could not create the cache directory {cache_path}, responses will not be cached")
+            cache_path = None
+
+    def _fetch_location(location: Tuple[float, float, str, str]) -> pd.DataFrame:
+        latitude, longitude, start, end = location
+        cache_file = None
+        if cache_path is not None:
+            cache_key = hashlib.sha1(
+                f"{base_url}|{latitude}|{longitude}|{start}|{end}|{OPEN_METEO_DAILY_VARIABLES}".encode()
+            ).hexdigest()
+            cache_file = Path(cache_path) / f"{cache_key}.json"
+            if cache_file.exists():
+                with open(cache_file) as file:
+                    return open_meteo_to_dataframe(json.load(file))
+
+        if requests_per_second:
+            with rate_lock:
+                wait = next_request_time[0] - time.monotonic()
+                next_request_time[0] = max(next_request_time[0], time.monotonic()) + 1 / requests_per_second
+            if wait > 0:
+                time.sleep(wait)
+
+        weather_data = request_open_meteo(session, base_url, latitude, longitude, start, end)
+        if cache_file is not None:
+            # Write next to the cache file and move it into place, so an interrupted run never leaves
+            # a truncated response behind
+            temporary_cache_file = cache_file.with_name(f"{cache_file.name}.tmp")
+            with open(temporary_cache_file, "w") as file:
+                json.dump(weather_data, file)
+            os.replace(temporary_cache_file, cache_file)
+        return open_meteo_to_dataframe(weather_data)
+
+    location_tuples = list(locations[["lat", "lon", "start", "end"]].itertuples(index=False, name=None))
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_fetch_location, location_tuples))
+
+
+def get_weather_for_household(
+    hh_data: pd.DataFrame,
+    max_workers: int = 8,
+    requests_per_second: Optional[float] = 5,
+    coordinate_decimals: int = 4,
+    cache_path: Optional[Union[str, Path]] = OPEN_METEO_CACHE_PATH,
+    base_url: str = OPEN_METEO_ARCHIVE_URL,
+) -> pd.DataFrame:
     """
     Fetches weather data for each household's location and merges it with household data.
 
     This function takes household data containing latitude, longitude, and date information,
     fetches weather data for each household's location and date, and combines it with the
     original household data. The weather data includes maximum, minimum, and mean temperatures,
-    as well as total daily precipitation.
+    as well as total daily precipitation. Households are grouped by location (rounded to
+    coordinate_decimals), and each location is fetched with one request covering all its dates.
 
     Parameters:
         hh_data (pd.DataFrame): Household data containing 'lat', 'lon', and 'date' columns.
+        max_workers (int): Number of concurrent requests. Default is 8.
+        requests_per_second (float): Maximum number of requests started per second, None for no limit. Default is 5.
+        coordinate_decimals (int): Decimals the coordinates are rounded to when grouping locations. Default is 4.
+        cache_path (str or Path): Directory of the cached responses, None to disable the cache.
+                                  Default is OPEN_METEO_CACHE_PATH.
+        base_url (str): URL of the Open-Meteo archive API. Default is OPEN_METEO_ARCHIVE_URL.
 
     Returns:
         pd.DataFrame: A DataFrame containing combined household and weather data
     """
     # Extract necessary columns and preprocess the date
-    hh_data = hh_data[["lat", "lon", "date"]]
-    hh_data.loc[:, "date"] = pd.to_datetime(hh_data["date"]).dt.date
-    hh_data = hh_data.drop_duplicates()
-    hh_data.set_index("date", inplace=True)
-
-    # Fetch weather data for each household's location and date
-    weather_dataframes = pd.DataFrame()
-    for index, row in hh_data.iterrows():
-        weather_data = get_weather_data_open_meteo(row["lat"], row["lon"], index)
-        weather_dataframes = pd.concat(
-            [weather_dataframes, weather_data], ignore_index=True
-        )
-
-    # Reset index of household data and select relevant columns from weather data
-    hh_data = hh_data.reset_index()
-    weather_dataframes = weather_dataframes[
-        [
-            "temperature_2m_max",
-            "temperature_2m_min",
-            "temperature_2m_mean",
-            "precipitation_sum",
-        ]
-    ]
+    hh_data = hh_data[["lat", "lon", "date"]].copy()
+    hh_data["date"] = pd.to_datetime(hh_data["date"]).dt.date
+    hh_data = hh_data.drop_duplicates().reset_index(drop=True)
+    hh_data = hh_data[["date", "lat", "lon"]]
+
+    # One request per rounded location, covering all of its household dates
+    request_keys = pd.DataFrame(
+        {
+            "lat": hh_data["lat"].round(coordinate_decimals),
+            "lon": hh_data["lon"].round(coordinate_decimals),
+            "date": hh_data["date"].astype(str),
+        }
+    )
+    locations = (
+        request_keys.groupby(["lat", "lon"], sort=False)["date"]
+        .agg(start="min", end="max")
+        .reset_index()
+    )
+    print(f"Fetching Open-Meteo weather for {len(locations)} locations ({len(hh_data)} households)")
+
+    weather_dataframes = fetch_open_meteo_locations(
+        locations,
+        max_workers=max_workers,
+        requests_per_second=requests_per_second,
+        cache_path=cache_path,
+        base_url=base_url,
+    )
+    for location_indx, weather_df in enumerate(weather_dataframes):
+        weather_df["lat"] = locations.at[location_indx, "lat"]
+        weather_df["lon"] = locations.at[location_indx, "lon"]
+    weather_dataframes = pd.concat(weather_dataframes, ignore_index=True)
+
+    # Pick the weather of every household's date at its location
+    weather_dataframes = request_keys.merge(
+        weather_dataframes, on=["lat", "lon", "date"], how="left", validate="m:1"
+    )[OPEN_METEO_DAILY_VARIABLES]
 
     # Combine household data with weather data
     weather_data_combined = pd.concat([hh_data, weather_dataframes], axis=1)
@@ -1,28 +1,82 @@
 from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import contextily as ctx
 from scipy.stats import gamma, norm
 import matplotlib.pyplot as plt
+import shapely
 import xarray
 import rioxarray
+from rasterio.features import geometry_mask
 from pandas.api.types import is_datetime64_any_dtype
 from datetime import datetime
 from src.survey.helper import dataframe_reader
-from src.weather.constants import GEO_COLUMNS, PROCESSED_INTERPOLATED_DATA_PATH
+from src.weather.constants import (
+    ADMIN_GEOMETRIES_PATH,
+    ADMIN_SIMPLIFY_TOLERANCE,
+    CLIP_MASKS_PATH,
+    GEO_COLUMNS,
+    GRID_ADMIN_INDEX_PATH,
+    PROCESSED_INTERPOLATED_DATA_PATH,
+)
 
 
 from .utils import (
     compute_severity_ranking,
+    compute_severity_ranking_run_length,
     compute_years_daily_averaging_threshold_per_grid,
+    compute_daily_averaging_thresholds_cube,
     initialize_features_columns,
     check_file_existence,
+    daily_thresholds_to_array,
+    grid_index,
+    grouped_rolling_mean,
     extract_timescales,
     thresholds_saver_loader,
-    batching
+    batching,
+    batch_size_from_memory_budget,
+    query_weather,
+    open_weather_dataset,
+    dataset_to_pandas,
+    dataset_years,
+    read_dataset_year,
+    dataset_spatial_tiles,
+    read_dataset_tile,
+    append_to_dataset,
 )
 
+# "pandas" runs on in-memory DataFrames, "partitioned" streams Parquet datasets by year or spatial tile
+ENGINES = ["pandas", "partitioned"]
+
+
+def check_engine(engine: str, output_path: Optional[str] = None) -> bool:
+    """
+    Check the engine of a pipeline step.
+
+    Parameters:
+    - engine (str): One of ENGINES.
+    - output_path (str, optional): Output dataset of the step, required by the "partitioned" engine.
+
+    Returns:
+    - bool: True for the "partitioned" engine.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}, use one of {ENGINES}")
+    if engine == "partitioned":
+        if output_path is None:
+            raise ValueError("The partitioned engine needs an output_path to write its dataset to")
+        if check_file_existence(output_path):
+            raise ValueError(f"{output_path} already exists, remove it or choose another output_path")
+    return engine == "partitioned"
+
 
 def aggr_monthly(df, column_aggr=""):
     """
@@ -187,8 +241,214 @@ def aggr_seosonal_nigeria(df):
     return df_seasonal
 
 
+_DISSOLVED_MAPS: Dict[str, gpd.GeoDataFrame] = {}
+_ADMIN_GEOJSONS: Dict[str, str] = {}
+
+
+def map_fingerprint(map_df, col_dissolve):
+    """
+    Hash the geometries, the col_dissolve values and the CRS of a map, to key the caches of its admin layers.
+    """
+    key = hashlib.sha1()
+    key.update(b"".join(map_df.geometry.to_wkb()))
+    key.update(map_df[col_dissolve].astype(str).str.cat(sep="|").encode())
+    key.update(f"{col_dissolve}|{map_df.crs}".encode())
+    return key.hexdigest()
+
+
+def dissolve_map(map_df, col_dissolve):
+    """
+    Dissolve a map on an admin column, once per map.
+
+    Dissolved layers are cached in memory and as GeoParquet files in ADMIN_GEOMETRIES_PATH,
+    keyed by map_fingerprint, so the admin1 and admin2 layers are only dissolved once.
+
+    Parameters
+    ----------
+    map_df : geopandas.GeoDataFrame
+        The map with the col_dissolve column.
+
+    col_dissolve : str
+        The column name in map_df used to dissolve the geometry into unique polygons.
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+        Same as map_df.dissolve(col_dissolve).reset_index().
+    """
+    key = map_fingerprint(map_df, col_dissolve)
+    if key not in _DISSOLVED_MAPS:
+        dissolved_path = ADMIN_GEOMETRIES_PATH / f"{key}.parquet"
+        if check_file_existence(dissolved_path):
+            _DISSOLVED_MAPS[key] = gpd.read_parquet(dissolved_path)
+        else:
+            _DISSOLVED_MAPS[key] = map_df.dissolve(col_dissolve).reset_index()
+            try:
+                os.makedirs(ADMIN_GEOMETRIES_PATH, exist_ok=True)
+                _DISSOLVED_MAPS[key].to_parquet(dissolved_path)
+            except OSError:
+                print(f"Could not save the dissolved map to {ADMIN_GEOMETRIES_PATH}, keeping it in memory only")
+    return _DISSOLVED_MAPS[key].copy()
+
+
+def admin_geojson(map_df, col_dissolve, tolerance=ADMIN_SIMPLIFY_TOLERANCE):
+    """
+    Simplified GeoJSON of the admin units of a map, for the folium maps of the dashboard.
+
+    The dissolved layer is simplified as a coverage, so neighbouring admin units keep their shared borders
+    (per-polygon topology preserving simplification on shapely < 2.1), and only col_dissolve is kept as
+    feature property. GeoJSON strings are cached in memory and as .geojson files in ADMIN_GEOMETRIES_PATH,
+    keyed by map_fingerprint and the tolerance.
+
+    Parameters
+    ----------
+    map_df : geopandas.GeoDataFrame
+        The map with the col_dissolve column.
+
+    col_dissolve : str
+        The column name in map_df used to dissolve the geometry into unique polygons.
+
+    tolerance : float, optional
+        Simplification tolerance in the units of the map CRS. Default is ADMIN_SIMPLIFY_TOLERANCE.
+
+    Returns
+    -------
+    str
+        GeoJSON FeatureCollection with one feature per admin unit.
+    """
+    key = f"{map_fingerprint(map_df, col_dissolve)}_{tolerance}"
+    if key not in _ADMIN_GEOJSONS:
+        geojson_path = ADMIN_GEOMETRIES_PATH / f"{key}.geojson"
+        if check_file_existence(geojson_path):
+            _ADMIN_GEOJSONS[key] = geojson_path.read_text()
+        else:
+            dissolved_df = dissolve_map(map_df, col_dissolve)
+            if hasattr(shapely, "coverage_simplify"):
+                geometry = shapely.coverage_simplify(dissolved_df.geometry.values, tolerance)
+            else:
+                geometry = dissolved_df.geometry.simplify(tolerance, preserve_topology=True)
+            _ADMIN_GEOJSONS[key] = (
+                dissolved_df[[col_dissolve]].set_geometry(geometry, crs=dissolved_df.crs).to_json()
+            )
+            try:
+                os.makedirs(ADMIN_GEOMETRIES_PATH, exist_ok=True)
+                geojson_path.write_text(_ADMIN_GEOJSONS[key])
+            except OSError:
+                print(f"Could not save the admin GeoJSON to {ADMIN_GEOMETRIES_PATH}, keeping it in memory only")
+    return _ADMIN_GEOJSONS[key]
+
+
+_GRID_ADMIN_INDEXES: Dict[str, Dict[str, np.ndarray]] = {}
+
+
+def grid_admin_index(map_df, other_df, col_dissolve, method="intersects"):
+    """
+    Map the unique grid points of a GeoDataFrame to the dissolved admin units of a map, with a single spatial join.
+
+    Indexes are cached in memory and as .npz files in GRID_ADMIN_INDEX_PATH, keyed by a hash of the grid
+    coordinates, the map geometries, col_dissolve, the predicate and the CRS, so a grid is only joined once per map.
+
+    Parameters
+    ----------
+    map_df : geopandas.GeoDataFrame
+        The map with the col_dissolve column.
+
+    other_df : geopandas.GeoDataFrame
+        Point data with 'lon' and 'lat' columns in its CRS.
+
+    col_dissolve : str
+        The column name in map_df used to dissolve the geometry into unique polygons.
+
+    method : str, optional
+        The predicate of the spatial join. Default is "intersects".
+
+    Returns
+    -------
+    dict
+        'lon' and 'lat': the sorted unique grid coordinates,
+        'grid_id' and 'admin_id': int32 arrays of the (grid point, admin unit) pairs of the join,
+        'admin_codes': the col_dissolve value of every admin_id, in dissolve order.
+    """
+    grid_df = other_df[GEO_COLUMNS].drop_duplicates().sort_values(GEO_COLUMNS)
+    lons = grid_df["lon"].to_numpy(dtype=float)
+    lats = grid_df["lat"].to_numpy(dtype=float)
+
+    key = hashlib.sha1()
+    key.update(lons.tobytes())
+    key.update(lats.tobytes())
+    key.update(map_fingerprint(map_df, col_dissolve).encode())
+    key.update(f"{method}|{other_df.crs}".encode())
+    key = key.hexdigest()
+
+    if key in _GRID_ADMIN_INDEXES:
+        return _GRID_ADMIN_INDEXES[key]
+
+    index_path = GRID_ADMIN_INDEX_PATH / f"{key}.npz"
+    if check_file_existence(index_path):
+        with np.load(index_path) as index_file:
+            index = {name: index_file[name] for name in index_file.files}
+    else:
+        grid_pts = gpd.GeoDataFrame(
+            geometry=gpd.points_from_xy(lons, lats), crs=other_df.crs
+        )
+        dissolved_df = dissolve_map(map_df, col_dissolve)
+        admin_codes = dissolved_df[col_dissolve].to_numpy()
+        pairs = gpd.sjoin(
+            dissolved_df[["geometry"]].to_crs(grid_pts.crs), grid_pts, predicate=method
+        )
+        pairs = pd.DataFrame(
+            {"grid_id": pairs["index_right"].to_numpy(), "admin_id": pairs.index.to_numpy()}
+        ).sort_values(["grid_id", "admin_id"])
+        index = {
+            "lon": lons,
+            "lat": lats,
+            "grid_id": pairs["grid_id"].to_numpy(dtype=np.int32),
+            "admin_id": pairs["admin_id"].to_numpy(dtype=np.int32),
+            "admin_codes": admin_codes.astype(str),
+        }
+        try:
+            os.makedirs(GRID_ADMIN_INDEX_PATH, exist_ok=True)
+            np.savez(index_path, **index)
+        except OSError:
+            print(f"Could not save the grid to admin index to {GRID_ADMIN_INDEX_PATH}, keeping it in memory only")
+
+    _GRID_ADMIN_INDEXES[key] = index
+    return index
+
+
+def combine_with_grid_admin_index(map_df, other_df, col_dissolve, group_cols, agg_dict, method="intersects"):
+    """
+    Same as combine, with the spatial join replaced by the cached grid to admin index of grid_admin_index.
+
+    The rows are aggregated by an integer groupby on the admin ids and the dissolved geometry is attached at the end.
+    """
+    index = grid_admin_index(map_df, other_df, col_dissolve, method)
+
+    # Position of the grid point of every row in the index, then one row per (row, admin unit) pair
+    grid_ids = pd.MultiIndex.from_arrays([index["lon"], index["lat"]]).get_indexer(
+        pd.MultiIndex.from_arrays([other_df["lon"].to_numpy(dtype=float), other_df["lat"].to_numpy(dtype=float)])
+    )
+    pairs = pd.DataFrame({"grid_id": index["grid_id"], "admin_id": index["admin_id"]})
+    value_cols = [col for col in agg_dict if col != "geometry"]
+    admin_db = (
+        pd.DataFrame(other_df[group_cols + value_cols])
+        .assign(grid_id=grid_ids.astype(np.int32))
+        .merge(pairs, on="grid_id")
+        .groupby(["admin_id"] + group_cols)
+        .agg({col: agg_dict[col] for col in value_cols})
+        .reset_index()
+    )
+
+    dissolved_df = dissolve_map(map_df, col_dissolve)
+    geometry = dissolved_df.set_index(col_dissolve).geometry
+    admin_codes = dissolved_df[col_dissolve].to_numpy()[admin_db.pop("admin_id").to_numpy()]
+    admin_db.insert(0, col_dissolve, admin_codes)
+    admin_db["geometry"] = geometry.loc[admin_codes].to_numpy()
+    return admin_db
+
+
 def combine(
-    map_df, other_df, col_dissolve, group_cols=None, agg_dict={}, method="intersects"
+    map_df, other_df, col_dissolve, group_cols=None, agg_dict={}, method="intersects", use_index=True
 ):
     """
     Function to combine two GeoDataFrames based on a spatial join operation and group by operations.
@@ -214,18 +474,28 @@ def combine(
         The method to be used for the spatial join operation. It could be "intersects", "within", "contains", etc.
         Default is "intersects".
 
+    use_index : bool, optional
+        If True, replace the spatial join of the rows by the cached grid to admin index of their unique grid points
+        (see grid_admin_index), for point data with 'lon' and 'lat' columns. If False, join every row with gpd.sjoin.
+        Both give the same result. Default is True.
+
     Returns
     -------
     admin_db : geopandas.GeoDataFrame
         The GeoDataFrame resulting from the spatial join and group by operations.
 
     """
-    dissolved_df = map_df.dissolve(col_dissolve).reset_index()
-    admin_db = gpd.sjoin(dissolved_df, other_df, predicate=method)
     if not bool(agg_dict):
         raise ValueError(
             "agg_dict is empty, provide dictionary with column and aggregation mechanism"
         )
+    if group_cols is None:
+        group_cols = []
+    if use_index:
+        return combine_with_grid_admin_index(map_df, other_df, col_dissolve, group_cols, agg_dict, method)
+
+    dissolved_df = dissolve_map(map_df, col_dissolve)
+    admin_db = gpd.sjoin(dissolved_df, other_df, predicate=method)
     # Group by and aggregate. Using 'first' for the geometry assumes that the geometry for each group is identical
     agg_dict["geometry"] = "first"
     admin_db = admin_db.groupby([col_dissolve] + group_cols).agg(agg_dict).reset_index()
@@ -343,6 +613,7 @@ def create_extreme_weather_event_delta(
     geo_columns: List[str],
     daily_thresholds: Dict[str, List[float]],
     delta_param: Optional[int] = None,
+    vectorized: bool = True,
 ) -> None:
     """
     Calculate deltas and identify extreme weather events based on given thresholds.
@@ -353,18 +624,65 @@ def create_extreme_weather_event_delta(
         geo_columns (List[str]): List of column names containing longitude and latitude.
         daily_thresholds (Dict[str, List[float]]): A dictionary of daily threshold values indexed by unique geo keys.
         delta_param (Optional[int]): The delta parameter value. If not provided, defaults to None.
+        vectorized (bool, optional): If True, map every grid coordinate pair to an integer id once and
+            look up the thresholds in a dense (n_grid, 366) array for all rows at once. If False, apply
+            extreme_thresholding_delta row by row. Both produce the same output. Defaults to True.
 
     Returns:
         None: The function modifies the 'data' DataFrame by adding 'delta' and 'extreme' columns.
     """
-    
-    data[["delta", "extreme"]] = data.apply(
-        extreme_thresholding_delta,
-        args=(event, geo_columns, daily_thresholds, delta_param),
-        axis=1,
-        result_type="expand",
+    if not vectorized:
+        data[["delta", "extreme"]] = data.apply(
+            extreme_thresholding_delta,
+            args=(event, geo_columns, daily_thresholds, delta_param),
+            axis=1,
+            result_type="expand",
+        )
+        return
+
+    if not delta_param:
+        delta_param = 0
+
+    grid_ids, grid_keys = grid_index(data, geo_columns)
+    thresholds = daily_thresholds_to_array(daily_thresholds, grid_keys)
+
+    threshold_values = thresholds[grid_ids, data["day"].to_numpy() - 1]
+    delta = data[event].to_numpy(dtype=float) - threshold_values
+    delta = np.where(delta < 0, 0.0, delta)
+
+    data["delta"] = delta
+    data["extreme"] = delta > delta_param
+
+
+def compute_tile_indicators(
+    data: pd.DataFrame,
+    event: str,
+    rolling_window: int = 3,
+    delta_param: int = 5,
+    days_param: int = 3,
+) -> None:
+    """
+    Compute the thresholds, delta, severity and ranking of all grid cells of a DataFrame, without caching.
+
+    Used by the "partitioned" engine of heatwave_heavy_rainfall_indicators on each spatial tile.
+
+    Parameters:
+        data (pd.DataFrame): The weather data of whole grid cells, with 'date', 'lon', 'lat' and event columns.
+        event (str): The weather event name (e.g., 'temperature', 'precipitation').
+        rolling_window (int, optional): Rolling window size for computing daily averaging thresholds. Default is 3.
+        delta_param (int, optional): Delta parameter for creating extreme weather event delta. Default is 5.
+        days_param (int, optional): Days parameter for computing severity. Default is 3.
+
+    Returns:
+        None. The indicator columns are added to data.
+    """
+    extract_timescales(data)
+    daily_averaging_thresholds, _ = compute_daily_averaging_thresholds_cube(
+        data, event, GEO_COLUMNS, rolling_window
     )
-    
+    create_extreme_weather_event_delta(data, event, GEO_COLUMNS, daily_averaging_thresholds, delta_param)
+    initialize_features_columns(data)
+    compute_severity_ranking_run_length(data, event, days_param)
 
 
 def heatwave_heavy_rainfall_indicators(
@@ -375,6 +693,12 @@ def heatwave_heavy_rainfall_indicators(
     delta_param: int = 5,
     days_param: int = 3,
     batch_size: int = 3,
+    vectorized: bool = True,
+    output_path: Optional[str] = None,
+    memory_budget_gb: Optional[float] = None,
+    lazy: bool = False,
+    engine: str = "pandas",
+    tile_size: float = 2.0,
 ):
     """
     Compute heatwave or heavy rainfall indicators for extreme weather event definition.
@@ -387,16 +711,46 @@ def heatwave_heavy_rainfall_indicators(
         rolling_window (int, optional): Rolling window size for computing daily averaging thresholds. Default is 3.
         delta_param (int, optional): Delta parameter for creating extreme weather event delta. Default is 5.
         days_param (int, optional): Days parameter for creating extreme weather event delta. Default is 3.
+        batch_size (int, optional): Number of years processed per batch. Default is 3.
+        vectorized (bool, optional): Use the cube based thresholds, vectorized delta/extreme and run-length
+            severity computations. Default is True.
+        output_path (str, optional): If given, every finished batch is appended to a Parquet dataset
+            partitioned by year in this directory instead of being kept in memory, and the cached
+            all_*_indicators.pickle is not reused. Default is None.
+        memory_budget_gb (float, optional): If given, batch_size is picked so that one batch fits in this
+            memory budget (see 'batch_size_from_memory_budget'). Default is None.
+        lazy (bool, optional): With output_path, return a pyarrow dataset of the written files instead of
+            reading them back into a DataFrame. Default is False.
+        engine (str, optional): "pandas" computes on the data DataFrame. "partitioned" reads data as a Parquet
+            dataset (path or pyarrow dataset) one spatial tile at a time, computes the thresholds and indicators
+            of the tile, and appends them to output_path. The indicators of a grid cell only depend on its own
+            history, so both engines give the same values. Default is "pandas".
+        tile_size (float, optional): Tile width and height in degrees for the "partitioned" engine. Default is 2.0.
 
     Returns:
         None. Computes and saves the relevant indicators based on the specified parameters.
     """
     geo_columns = GEO_COLUMNS
+
+    if check_engine(engine, output_path):
+        print(f"[START] {event.title()} indicators by spatial tile of {tile_size} degrees")
+        dataset = open_weather_dataset(data)
+        for tile_indx, tile in enumerate(dataset_spatial_tiles(dataset, tile_size)):
+            tile_data = read_dataset_tile(dataset, tile)
+            print(f"  {'=' * 3 } Tile {tile_indx + 1} {tile} | {tile_data.shape[0]} points")
+            compute_tile_indicators(tile_data, event, rolling_window, delta_param, days_param)
+            append_to_dataset(tile_data, output_path, f"tile-{tile_indx}")
+            del tile_data
+
+        print(f"[FINISH] Indicators written to {output_path}")
+        indicators = open_weather_dataset(output_path)
+        return indicators if lazy else dataset_to_pandas(indicators.to_table())
         
     indicator_filename = "all_temperature_interpolated_indicators" if event.startswith("temp") else "all_precipitation_indicators"
     indicator_path = f"{PROCESSED_INTERPOLATED_DATA_PATH}/{indicator_filename}.pickle"
 
-    if check_file_existence(indicator_path):
+    # The cached indicators are only reused for in-memory runs, output_path always gets freshly computed data
+    if output_path is None and check_file_existence(indicator_path):
         print(
             f"[FINISH] The weather event indicator already exist in {indicator_path}"
         )
@@ -410,6 +764,9 @@ def heatwave_heavy_rainfall_indicators(
         print(f"Ensure {columns} is defined in the data")
         return
 
+    if data.empty:
+        raise ValueError(f"No {event} data to compute the indicators on")
+
     print(
         f"[START] {event.title()} Delta, Severity & Ranking Computation for MOC/IPCC Extreme Weather Event Definition"
     )
@@ -427,9 +784,14 @@ def heatwave_heavy_rainfall_indicators(
 
     if not check_file_existence(daily_averaging_thresholds_path):
         print(f"{'=' * 3 }> Historical {event} Daily Averaging Thresholds")
-        daily_averaging_thresholds = compute_years_daily_averaging_threshold_per_grid(
-            data, event, geo_columns, rolling_window
-        )
+        if vectorized:
+            daily_averaging_thresholds, _ = compute_daily_averaging_thresholds_cube(
+                data, event, geo_columns, rolling_window
+            )
+        else:
+            daily_averaging_thresholds = compute_years_daily_averaging_threshold_per_grid(
+                data, event, geo_columns, rolling_window
+            )
         thresholds_saver_loader(
             daily_averaging_thresholds_path, daily_averaging_thresholds
         )
@@ -450,14 +812,50 @@ def heatwave_heavy_rainfall_indicators(
             delta_param (int): Delta parameter for thresholding.
             days_param (int): Number of days for parameter computation.
         """
-        create_extreme_weather_event_delta(subset_data, event, geo_columns, daily_averaging_thresholds, delta_param)
+        create_extreme_weather_event_delta(subset_data, event, geo_columns, daily_averaging_thresholds, delta_param, vectorized)
         initialize_features_columns(subset_data)
-        compute_severity_ranking(subset_data, event, days_param)
+        if vectorized:
+            compute_severity_ranking_run_length(subset_data, event, days_param)
+        else:
+            compute_severity_ranking(subset_data, event, days_param)
    
+    if memory_budget_gb is not None:
+        batch_size = batch_size_from_memory_budget(data, memory_budget_gb)
+        print(f"  {'=' * 3 } {batch_size} years per batch for a {memory_budget_gb} GB memory budget")
+
     # Sort the unique years in data and check whether number of years is bigger than batch_size
     unique_years = sorted(data.year.unique())
     batched = len(unique_years) > batch_size
-    
+
+    if output_path is not None:
+        if check_file_existence(output_path):
+            raise ValueError(f"{output_path} already exists, remove it or choose another output_path")
+
+        start_time = datetime.now()
+
+        for phase, batch_years in enumerate(batching(unique_years, batch_size)):
+            batch_years_data = data[data.year.isin(batch_years)].copy()
+            print(f"  {'=' * 3 } Batch {phase + 1} Featurization Computation - {batch_years} | {batch_years_data.shape[0]} points")
+
+            _get_indicator_features(batch_years_data, event, geo_columns, daily_averaging_thresholds, delta_param, days_param)
+            output_columns = list(batch_years_data.columns)
+            pq.write_to_dataset(
+                pa.Table.from_pandas(batch_years_data, preserve_index=False),
+                root_path=output_path,
+                partition_cols=["year"],
+            )
+            del batch_years_data
+
+        print(datetime.now() - start_time)
+        print(f"[FINISH] Indicators written to {output_path}")
+        indicators = ds.dataset(output_path, format="parquet", partitioning="hive")
+        if lazy:
+            return indicators
+        year_dtype = data["year"].dtype
+        data = indicators.to_table(columns=output_columns).to_pandas()
+        data["year"] = data["year"].astype(year_dtype)
+        return data
+
     if batched:
         batched_years = batching(unique_years, batch_size)
         batched_data = []
@@ -532,7 +930,322 @@ def combine_map_weather(
     return df_final
 
 
-def calculate_SPI(df, column_rol="precipitation"):
+# Time levels of the admin weather cube and the period column of each level
+CUBE_LEVELS = {"year": None, "season": "season", "month": "month"}
+
+
+def grid_admin_membership(nigeria_shape_df, weather_df, col_dissolve):
+    """
+    Find the admin units of every grid point of the weather data, as combine() does for each aggregate,
+    from the cached grid to admin index.
+
+    Parameters:
+    -----------
+    nigeria_shape_df: geopandas.GeoDataFrame
+        Nigeria map with admin columns.
+    weather_df: pandas.DataFrame
+        Weather data with 'lon' and 'lat' columns.
+    col_dissolve: str
+        Admin column to dissolve the map on, e.g. "admin1Pcod".
+
+    Returns:
+    --------
+    pandas.DataFrame
+        'lon', 'lat' and 'admin_code' columns, one row per grid point and intersecting admin unit.
+    """
+    grid_pts = convert_point_crs(df=weather_df[GEO_COLUMNS].drop_duplicates(), target_epsg=4326)
+    index = grid_admin_index(convert_map_crs(nigeria_shape_df, epsg=4326), grid_pts, col_dissolve)
+    return pd.DataFrame(
+        {
+            "lon": index["lon"][index["grid_id"]],
+            "lat": index["lat"][index["grid_id"]],
+            "admin_code": index["admin_codes"][index["admin_id"]],
+        }
+    )
+
+
+def build_admin_weather_cube(
+    nigeria_shape_df,
+    weather_df,
+    weather_data_names,
+    admin_levels=("admin1Pcod", "admin2Pcod"),
+    output_path=None,
+):
+    """
+    Precompute the admin level weather aggregates shown by the dashboard.
+
+    Gives the same values as combine_map_weather with the dashboard agg_dict, for every admin level,
+    indicator, time level and period at once: the grid points are joined to the map once per admin level
+    and the grid aggregates of aggr_monthly/aggr_yearly/aggr_seosonal_nigeria are averaged per admin unit.
+
+    Parameters:
+    -----------
+    nigeria_shape_df: geopandas.GeoDataFrame
+        Nigeria map with admin columns.
+    weather_df: pandas.DataFrame
+        Daily weather data with 'date', 'year', 'month', 'lon', 'lat' and indicator columns.
+    weather_data_names: list
+        Indicator columns to aggregate, e.g. ["precipitation", "temperature"].
+    admin_levels: tuple, optional
+        Admin columns of the map to aggregate on. Default is ("admin1Pcod", "admin2Pcod").
+    output_path: str, optional
+        Parquet file to write the cube to. Default is None.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        The cube, with 'admin_level', 'admin_code', 'indicator', 'level', 'year', 'season', 'month',
+        'mean', 'min' and 'max' columns. 'season' and 'month' are only set on the rows of their level.
+    """
+    grid_aggregates = {}
+    for weather_data_name in weather_data_names:
+        monthly_df = aggr_monthly(df=weather_df.copy(), column_aggr=weather_data_name)
+        grid_aggregates[weather_data_name] = {
+            "year": aggr_yearly(df=weather_df, column_aggr=weather_data_name),
+            "season": aggr_seosonal_nigeria(df=monthly_df.copy()),
+            "month": monthly_df,
+        }
+
+    cube = []
+    for col_dissolve in admin_levels:
+        membership = grid_admin_membership(nigeria_shape_df, weather_df, col_dissolve)
+        for weather_data_name, level_aggregates in grid_aggregates.items():
+            for level, aggr_weather_df in level_aggregates.items():
+                group_cols = ["admin_code", "year"] + ([CUBE_LEVELS[level]] if CUBE_LEVELS[level] else [])
+                admin_df = (
+                    aggr_weather_df.merge(membership, on=GEO_COLUMNS)
+                    .groupby(group_cols)[["mean", "min", "max"]]
+                    .mean()
+                    .reset_index()
+                )
+                admin_df["admin_level"] = col_dissolve
+                admin_df["indicator"] = weather_data_name
+                admin_df["level"] = level
+                cube.append(admin_df)
+
+    cube = pd.concat(cube, ignore_index=True)
+    cube["month"] = cube["month"].astype("Int8")
+    cube = cube[
+        ["admin_level", "admin_code", "indicator", "level", "year", "season", "month", "mean", "min", "max"]
+    ]
+    if output_path is not None:
+        # Sorted small row groups let query_admin_weather skip the rows of other selections
+        cube = cube.sort_values(["admin_level", "indicator", "level", "year"], ignore_index=True)
+        cube.to_parquet(output_path, index=False, row_group_size=10_000)
+    return cube
+
+
+def lookup_admin_weather(
+    admin_weather_cube,
+    dissolved_df,
+    col_dissolve,
+    weather_data_name,
+    level,
+    year=None,
+    month=None,
+    season=None,
+):
+    """
+    Read the admin level aggregates of one indicator from the admin weather cube.
+
+    Replaces combine_map_weather in the dashboard, returning the same columns without touching the grid data.
+
+    Parameters:
+    -----------
+    admin_weather_cube: pandas.DataFrame
+        The cube of build_admin_weather_cube.
+    dissolved_df: geopandas.GeoDataFrame
+        Nigeria map dissolved on col_dissolve, giving the geometry of the admin units.
+    col_dissolve: str
+        Admin level, e.g. "admin1Pcod".
+    weather_data_name: str
+        Indicator, e.g. "precipitation".
+    level: str
+        "year", "season" or "month".
+    year, month, season: optional
+        Period to keep. Default is None, keeping all periods.
+
+    Returns:
+    --------
+    geopandas.GeoDataFrame
+        col_dissolve, 'year', the 'season' or 'month' column of the level, 'mean', 'min', 'max' and 'geometry'.
+    """
+    if level not in CUBE_LEVELS:
+        raise ValueError(f"Unknown level {level}, use one of {list(CUBE_LEVELS)}")
+
+    mask = (
+        (admin_weather_cube["admin_level"] == col_dissolve)
+        & (admin_weather_cube["indicator"] == weather_data_name)
+        & (admin_weather_cube["level"] == level)
+    )
+    if year is not None:
+        mask &= admin_weather_cube["year"] == year
+    if month is not None and level == "month":
+        mask &= admin_weather_cube["month"] == month
+    if season is not None and level == "season":
+        mask &= admin_weather_cube["season"] == season
+
+    period_cols = [CUBE_LEVELS[level]] if CUBE_LEVELS[level] else []
+    admin_df = admin_weather_cube.loc[mask, ["admin_code", "year"] + period_cols + ["mean", "min", "max"]]
+    admin_df = admin_df.rename(columns={"admin_code": col_dissolve})
+    if level == "month":
+        admin_df["month"] = admin_df["month"].astype(int)
+    admin_df = dissolved_df[[col_dissolve, "geometry"]].merge(admin_df, on=col_dissolve)
+    return admin_df[[col_dissolve, "year"] + period_cols + ["mean", "min", "max", "geometry"]]
+
+
+def query_admin_weather(
+    cube_source,
+    dissolved_df,
+    col_dissolve,
+    weather_data_name,
+    level,
+    year=None,
+    month=None,
+    season=None,
+):
+    """
+    Read the admin level aggregates of one indicator and period from the admin weather cube file.
+
+    Same as lookup_admin_weather, but the selection is pushed down to the Parquet read of the cube
+    (see query_weather), so only the rows of the selected admin level, indicator, level and period are read.
+
+    Parameters:
+    -----------
+    cube_source: str, Path or file-like
+        The Parquet file of build_admin_weather_cube.
+    Other parameters and output are the same as in lookup_admin_weather.
+    """
+    if level not in CUBE_LEVELS:
+        raise ValueError(f"Unknown level {level}, use one of {list(CUBE_LEVELS)}")
+
+    filters = (
+        (ds.field("admin_level") == col_dissolve)
+        & (ds.field("indicator") == weather_data_name)
+        & (ds.field("level") == level)
+    )
+    # Season rows of the cube have a 'season' value and no month
+    if season is not None and level == "season":
+        filters &= ds.field("season") == season
+    admin_weather_cube = query_weather(
+        cube_source,
+        year=year,
+        month=month if level == "month" else None,
+        filters=filters,
+    )
+    return lookup_admin_weather(
+        admin_weather_cube,
+        dissolved_df,
+        col_dissolve,
+        weather_data_name,
+        level,
+    )
+
+
+def _fit_gamma_per_grid(
+    grid_values: List[np.ndarray],
+) -> Tuple[List[Tuple[float, float]], float, int]:
+    """
+    Fit a gamma distribution (with location fixed at 0) to the values of each grid cell.
+
+    Parameters:
+    - grid_values (List[np.ndarray]): The values of each grid cell.
+
+    Returns:
+    - Tuple[List[Tuple[float, float]], float, int]: The (shape, scale) of each grid cell,
+      the seconds spent fitting and the id of the process that did the fitting.
+    """
+    start = time.time()
+    gamma_parameters = []
+    for values in grid_values:
+        shape, loc, scale = gamma.fit(values, floc=0)
+        gamma_parameters.append((shape, scale))
+    return gamma_parameters, time.time() - start, os.getpid()
+
+
+def _fit_gamma_parameters(
+    grid_values: List[np.ndarray],
+    n_workers: int = 1,
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> np.ndarray:
+    """
+    Fit the gamma (shape, scale) of every grid cell by maximum likelihood, fanned out over worker processes.
+
+    Parameters:
+    - grid_values (List[np.ndarray]): The values of each grid cell.
+    - n_workers (int, optional): Number of worker processes of executor, used to size the batches. Defaults to 1.
+    - executor (ProcessPoolExecutor, optional): Pool fitting the batches. Defaults to None, which fits them
+                                                in the current process.
+
+    Returns:
+    - np.ndarray: Array of shape (n_grid, 2) with the shape and scale of each grid cell.
+    """
+    batched_grid_values = batching(grid_values, max(1, -(-len(grid_values) // (4 * n_workers))))
+    if executor is None:
+        fitted_batches = [_fit_gamma_per_grid(batch) for batch in batched_grid_values]
+    else:
+        fitted_batches = list(executor.map(_fit_gamma_per_grid, batched_grid_values))
+
+    worker_timings = {}
+    for batch, (_, seconds, worker) in zip(batched_grid_values, fitted_batches):
+        cells, total_seconds = worker_timings.get(worker, (0, 0.0))
+        worker_timings[worker] = (cells + len(batch), total_seconds + seconds)
+    for worker, (cells, total_seconds) in worker_timings.items():
+        print(f"  === Worker {worker}: {cells} grid cells fitted in {total_seconds:.2f}s")
+
+    return np.array(
+        [parameters for batch, _, _ in fitted_batches for parameters in batch]
+    )
+
+
+def approximate_gamma_parameters(
+    values: np.ndarray, grid_sizes: np.ndarray, estimator: str = "thom"
+) -> np.ndarray:
+    """
+    Approximate the gamma (shape, scale) of all grid cells at once from their means and log-means.
+
+    Parameters:
+    - values (np.ndarray): Positive values sorted so that each grid cell is a contiguous slice.
+    - grid_sizes (np.ndarray): Number of values of each grid cell, in slice order.
+    - estimator (str, optional): "thom" for Thom's approximation or "greenwood_durand" for the
+                                 Greenwood-Durand approximation of the shape. Defaults to "thom".
+
+    Returns:
+    - np.ndarray: Array of shape (n_grid, 2) with the shape and scale of each grid cell.
+    """
+    grid_starts = np.cumsum(grid_sizes) - grid_sizes
+    means = np.add.reduceat(values, grid_starts) / grid_sizes
+    log_means = np.add.reduceat(np.log(values), grid_starts) / grid_sizes
+    a = np.log(means) - log_means
+
+    if estimator == "thom":
+        shapes = (1 + np.sqrt(1 + 4 * a / 3)) / (4 * a)
+    elif estimator == "greenwood_durand":
+        shapes = np.where(
+            a <= 0.5772,
+            (0.5000876 + 0.1648852 * a - 0.0544274 * a**2) / a,
+            (8.898919 + 9.059950 * a + 0.9775373 * a**2)
+            / (a * (17.79728 + 11.968477 * a + a**2)),
+        )
+    else:
+        raise ValueError(
+            f"Unknown estimator {estimator}, use 'mle', 'thom' or 'greenwood_durand'"
+        )
+    return np.column_stack([shapes, means / shapes])
+
+
+def calculate_SPI(
+    df,
+    column_rol="precipitation",
+    n_workers=1,
+    estimator="mle",
+    grouped=True,
+    timescales=(3,),
+    engine="pandas",
+    output_path=None,
+    tile_size=2.0,
+    executor=None,
+):
     """
     Calculates the Standardized Precipitation Index (SPI) for given input data.
 
@@ -541,58 +1254,158 @@ def calculate_SPI(df, column_rol="precipitation"):
     - column_rol (str, optional): Column in the DataFrame containing precipitation data
                                   that will be used to calculate the rolling mean.
                                   Defaults to 'precipitation'.
-    - save (bool, optional): If to save the spi to a csv file. Defaults to False
-    - save (str, optional): Path to save the spi file. Defaults to spi_file.csv
+    - n_workers (int, optional): Number of processes fitting the gamma distributions of the
+                                 grid cells. 1 fits them in the current process. The pool is created
+                                 once per call, for all timescales and tiles. Defaults to 1.
+    - estimator (str, optional): How the gamma parameters are estimated. "mle" fits them by
+                                 maximum likelihood per grid cell, "thom" and "greenwood_durand"
+                                 approximate them for all grid cells at once (see
+                                 approximate_gamma_parameters). Defaults to 'mle'.
+    - grouped (bool, optional): If True, sort by lat, lon and date and compute the rolling mean
+                                per grid cell. If False, roll over the frame as it is ordered,
+                                across grid cells. Defaults to True.
+    - timescales (tuple of int, optional): SPI timescales in months (30 days each), e.g. (1, 3, 6, 12).
+                                           The 3-month SPI is stored in 'cumulative_prob' and 'SPI',
+                                           other timescales in '<n>_month_cumulative_prob' and
+                                           '<n>_month_SPI'. Defaults to (3,).
+    - engine (str, optional): "pandas" computes on the df DataFrame. "partitioned" reads df as a Parquet dataset
+                              (path or pyarrow dataset) one spatial tile at a time and appends the tiles with their
+                              SPI columns to output_path. Defaults to "pandas".
+    - output_path (str, optional): Output dataset of the "partitioned" engine. Defaults to None.
+    - tile_size (float, optional): Tile width and height in degrees for the "partitioned" engine. Defaults to 2.0.
+    - executor (ProcessPoolExecutor, optional): Existing pool of n_workers processes for the gamma fits,
+                                                instead of creating one. Defaults to None.
 
     Returns:
-    - df (pd.DataFrame): DataFrame with added columns for 3-month rolling mean of precipitation,
-                         cumulative probability, and the 3-month SPI.
-    """
-
-    # Compute 3-month rolling mean
-    df["3_month_precip_mean"] = df[column_rol].rolling(window=90, min_periods=1).mean()
-    # Add a small constant to the data
-    small_constant = 0.001
-    df["3_month_precip_mean"] = df["3_month_precip_mean"] + small_constant
-
-    # Check and print any NaN values
-    nan_values = df["3_month_precip_mean"].isna().sum()
-    if nan_values > 0:
-        print(f"Found {nan_values} NaN values in '3_month_precip_mean'.")
-
-    # Check and print any negative values
-    negative_values = (df["3_month_precip_mean"] < 0).sum()
-    if negative_values > 0:
-        print(f"Found {negative_values} negative values in '3_month_precip_mean'.")
-
-    # Check and print any zero values
-    zero_values = (df["3_month_precip_mean"] == 0).sum()
-    if zero_values > 0:
-        print(f"Found {zero_values} zero values in '3_month_precip_mean'.")
-
-    # Function to calculate cumulative probability for each lat-lon pair
-    def calculate_cumulative_prob(data, shape, scale):
-        return gamma.cdf(data["3_month_precip_mean"], shape, loc=0, scale=scale)
-
-    df["cumulative_prob"] = pd.Series(dtype="float64")
-    unique_points = df[["lat", "lon"]].drop_duplicates().values
-    print(f"number of unique_points: {len(unique_points)}")
-    for lat, lon in unique_points:
-        data = df[(df["lat"] == lat) & (df["lon"] == lon)]
-
-        # Compute gamma parameters
-        shape, loc, scale = gamma.fit(data["3_month_precip_mean"], floc=0)
-
-        # Calculate and store the cumulative probability
-        df.loc[data.index, "cumulative_prob"] = calculate_cumulative_prob(
-            data, shape, scale
-        )
-
-    # Convert cumulative probability to Z-scores to obtain the SPI
-    df["SPI"] = df["cumulative_prob"].apply(lambda x: norm.ppf(x))
+    - df (pd.DataFrame): DataFrame with added columns for the rolling mean of precipitation,
+                         cumulative probability, and the SPI of every timescale.
+                         With the "partitioned" engine, the pyarrow dataset written to output_path.
+    """
+    if executor is None and n_workers > 1 and estimator == "mle":
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            return calculate_SPI(
+                df, column_rol, n_workers, estimator, grouped, timescales, engine, output_path, tile_size, executor
+            )
+
+    if check_engine(engine, output_path):
+        dataset = open_weather_dataset(df)
+        for tile_indx, tile in enumerate(dataset_spatial_tiles(dataset, tile_size)):
+            tile_df = read_dataset_tile(dataset, tile)
+            print(f"  {'=' * 3 } Tile {tile_indx + 1} {tile} | {tile_df.shape[0]} points")
+            tile_df = calculate_SPI(
+                tile_df, column_rol, n_workers, estimator, grouped, timescales, executor=executor
+            )
+            if "year" not in tile_df.columns:
+                tile_df["year"] = pd.to_datetime(tile_df["date"]).dt.year
+            append_to_dataset(tile_df, output_path, f"tile-{tile_indx}")
+        return open_weather_dataset(output_path)
+
+    # Partition the data once into contiguous slices per lat-lon pair, in date order when rolling per grid cell
+    grid_ids, _ = grid_index(df, ["lat", "lon"])
+    if grouped:
+        order = np.lexsort((pd.to_datetime(df["date"]).to_numpy(), grid_ids))
+    else:
+        order = np.argsort(grid_ids, kind="stable")
+    grid_sizes = np.bincount(grid_ids)
+    sorted_precipitation = df[column_rol].to_numpy(dtype=float)[order]
+    print(f"number of unique_points: {len(grid_sizes)}")
+
+    for months in timescales:
+        mean_column = f"{months}_month_precip_mean"
+        spi_prefix = "" if months == 3 else f"{months}_month_"
+
+        # Compute the rolling mean over the timescale
+        if grouped:
+            sorted_means = grouped_rolling_mean(sorted_precipitation, grid_sizes, 30 * months)
+        else:
+            sorted_means = (
+                df[column_rol].rolling(window=30 * months, min_periods=1).mean().to_numpy()[order]
+            )
+        # Add a small constant to the data
+        small_constant = 0.001
+        sorted_means = sorted_means + small_constant
+
+        # Check and print any NaN values
+        nan_values = np.isnan(sorted_means).sum()
+        if nan_values > 0:
+            print(f"Found {nan_values} NaN values in '{mean_column}'.")
+
+        # Check and print any negative values
+        negative_values = (sorted_means < 0).sum()
+        if negative_values > 0:
+            print(f"Found {negative_values} negative values in '{mean_column}'.")
+
+        # Check and print any zero values
+        zero_values = (sorted_means == 0).sum()
+        if zero_values > 0:
+            print(f"Found {zero_values} zero values in '{mean_column}'.")
+
+        if estimator == "mle":
+            grid_values = np.split(sorted_means, np.cumsum(grid_sizes)[:-1])
+            gamma_parameters = _fit_gamma_parameters(grid_values, n_workers, executor)
+        else:
+            gamma_parameters = approximate_gamma_parameters(
+                sorted_means, grid_sizes, estimator
+            )
+        shapes = np.repeat(gamma_parameters[:, 0], grid_sizes)
+        scales = np.repeat(gamma_parameters[:, 1], grid_sizes)
+
+        # Calculate the cumulative probability and convert it to Z-scores to obtain the SPI
+        rolling_means, cumulative_prob = np.empty(len(df)), np.empty(len(df))
+        rolling_means[order] = sorted_means
+        cumulative_prob[order] = gamma.cdf(sorted_means, shapes, loc=0, scale=scales)
+        df[mean_column] = rolling_means
+        df[f"{spi_prefix}cumulative_prob"] = cumulative_prob
+        df[f"{spi_prefix}SPI"] = norm.ppf(cumulative_prob)
     return df
 
 
+def compare_spi_estimators(
+    df: pd.DataFrame,
+    column_rol: str = "precipitation",
+    estimators: Tuple[str, ...] = ("thom", "greenwood_durand"),
+    n_workers: int = 1,
+) -> pd.DataFrame:
+    """
+    Compare the SPI of the approximate gamma estimators against the maximum likelihood reference.
+
+    Parameters:
+    - df (pd.DataFrame): Input DataFrame containing precipitation data.
+    - column_rol (str, optional): Column in the DataFrame containing precipitation data. Defaults to 'precipitation'.
+    - estimators (Tuple[str, ...], optional): Estimators to compare. Defaults to ("thom", "greenwood_durand").
+    - n_workers (int, optional): Number of processes for the maximum likelihood fits. Defaults to 1.
+
+    Returns:
+    - pd.DataFrame: One row per estimator (the reference included) with the max and mean absolute
+                    SPI difference to the reference and the seconds the SPI computation took.
+    """
+    start = time.time()
+    reference_spi = calculate_SPI(df.copy(), column_rol, n_workers=n_workers)["SPI"]
+    comparison = [
+        {
+            "estimator": "mle",
+            "max_spi_difference": 0.0,
+            "mean_spi_difference": 0.0,
+            "seconds": time.time() - start,
+        }
+    ]
+
+    for estimator in estimators:
+        start = time.time()
+        spi = calculate_SPI(df.copy(), column_rol, estimator=estimator)["SPI"]
+        seconds = time.time() - start
+        spi_difference = (spi - reference_spi).abs()
+        comparison.append(
+            {
+                "estimator": estimator,
+                "max_spi_difference": spi_difference.max(),
+                "mean_spi_difference": spi_difference.mean(),
+                "seconds": seconds,
+            }
+        )
+    return pd.DataFrame(comparison)
+
+
 def xarray_upsample(da, lat_res, lon_res, method):
     """
     Upsample an xarray DataArray based on the provided latitude and longitude resolutions.
@@ -631,6 +1444,8 @@ def clip_data(
     df: pd.DataFrame,
     geo_df: gpd.GeoDataFrame,
     epsg: int = 4326,
+    method: str = "sjoin",
+    add_geometry: bool = True,
 ):
     """
     Processes and clips weather data in the DataFrame to a specified geographical region.
@@ -646,6 +1461,17 @@ def clip_data(
     epsg : int, optional
         EPSG code to set the Coordinate Reference System (CRS) for the data. Defaults to 4326 (WGS 84).
 
+    method : str, optional
+        "sjoin" tests the unique grid coordinates once with a spatial join on geo_df and keeps the same points
+        as "clip". "clip" runs gpd.clip on every row. "mask" looks the unique grid coordinates up in the cached
+        clip mask of their grid (see 'clip_mask'), keeping a point when its cell center falls within geo_df,
+        so points on the polygon boundaries can be dropped. Points that are not on a regular grid with at least
+        two values per axis fall back to "sjoin". Defaults to "sjoin".
+
+    add_geometry : bool, optional
+        If True, return a GeoDataFrame with a point geometry per row. If False, return the clipped rows of df
+        without creating the points. Defaults to True.
+
     Returns:
     -------
     pd.DataFrame
@@ -656,12 +1482,79 @@ def clip_data(
         raise ValueError(
             f"The map crs and desired weather crs don't match: {geo_df.crs.to_epsg()} != {epsg}"
         )
-
-    df = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df.lon, df.lat), crs=f"EPSG:{epsg}")
-    clipped_df = gpd.clip(df, geo_df)
+    if method not in ["mask", "sjoin", "clip"]:
+        raise ValueError(f"Unknown clip method {method}, use 'mask', 'sjoin' or 'clip'")
+
+    if method == "mask":
+        grid_da = points_to_grid(df)
+        if grid_da is None:
+            print("The points are not on a regular 2D grid, clipping with a spatial join")
+            method = "sjoin"
+        else:
+            grid_da.rio.write_crs(f"EPSG:{epsg}", inplace=True)
+            mask = clip_mask(da=grid_da, geo_df=geo_df)
+            y_indices = np.searchsorted(grid_da["y"].values, df["lat"].values)
+            x_indices = np.searchsorted(grid_da["x"].values, df["lon"].values)
+            clipped_df = df[mask[y_indices, x_indices]]
+
+    if method == "sjoin":
+        grid_ids, _ = grid_index(df, ["lon", "lat"])
+        _, first_rows = np.unique(grid_ids, return_index=True)
+        grid_points = gpd.GeoDataFrame(
+            geometry=gpd.points_from_xy(df.lon.values[first_rows], df.lat.values[first_rows]),
+            crs=f"EPSG:{epsg}",
+        )
+        # The spatial join queries the STRtree of the points, each grid point is tested once
+        joined = gpd.sjoin(grid_points, geo_df[["geometry"]], how="inner", predicate="intersects")
+        inside = np.zeros(len(first_rows), dtype=bool)
+        inside[joined.index.unique()] = True
+        clipped_df = df[inside[grid_ids]]
+
+    if method == "clip":
+        df = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df.lon, df.lat), crs=f"EPSG:{epsg}")
+        clipped_df = gpd.clip(df, geo_df)
+    elif add_geometry:
+        clipped_df = gpd.GeoDataFrame(
+            clipped_df,
+            geometry=gpd.points_from_xy(clipped_df.lon, clipped_df.lat),
+            crs=f"EPSG:{epsg}",
+        )
     return clipped_df
 
 
+def points_to_grid(df: pd.DataFrame) -> Optional[xarray.DataArray]:
+    """
+    Build the regular (y, x) grid that contains all 'lat'/'lon' points of a DataFrame.
+
+    Parameters:
+    - df (pd.DataFrame): DataFrame with 'lat' and 'lon' columns.
+
+    Returns:
+    - Optional[xarray.DataArray]: An empty DataArray on the grid, with every point on a grid cell center,
+      or None if the points are not on a regular grid. An axis with a single value has no resolution to
+      rasterize on, so it also gives None.
+    """
+    grid_coordinates = {}
+    for dim, column in [("y", "lat"), ("x", "lon")]:
+        values = np.unique(df[column].values)
+        if len(values) < 2:
+            return None
+        resolution = np.diff(values).min()
+        steps = np.round((values - values[0]) / resolution)
+        axis = values[0] + np.arange(steps[-1] + 1) * resolution
+        if not np.allclose(axis[steps.astype(int)], values):
+            return None
+        # Keep the exact point coordinates so they can be looked up on the grid
+        axis[steps.astype(int)] = values
+        grid_coordinates[dim] = axis
+
+    return xarray.DataArray(
+        np.zeros((len(grid_coordinates["y"]), len(grid_coordinates["x"])), dtype=bool),
+        coords=grid_coordinates,
+        dims=("y", "x"),
+    )
+
+
 def interpolate_data(
     df: gpd.GeoDataFrame,
     geo_df: gpd.GeoDataFrame,
@@ -725,18 +1618,87 @@ def interpolate_data(
     return df
 
 
-def clip_dataarray(da: xarray.DataArray, geo_df: gpd.GeoDataFrame) -> xarray.DataArray:
+# Clip masks already computed in this process, keyed like the files in CLIP_MASKS_PATH
+_CLIP_MASKS: Dict[str, np.ndarray] = {}
+
+
+def clip_mask(da: xarray.DataArray, geo_df: gpd.GeoDataFrame) -> np.ndarray:
+    """
+    Rasterize the geometries of a GeoDataFrame on the grid of a DataArray, the same way rio.clip does.
+
+    Masks are cached in memory and as .npy files in CLIP_MASKS_PATH, keyed by a hash of the grid
+    coordinates, the geometries and the CRS, so the geometries are only rasterized once per grid.
+
+    Parameters:
+    - da (xarray.DataArray): DataArray with the grid and CRS to rasterize on.
+    - geo_df (gpd.GeoDataFrame): The GeoDataFrame to use for clipping, in the CRS of da.
+
+    Returns:
+    - np.ndarray: Boolean (y, x) array, True for the grid cells whose center falls within the geometries.
+    """
+    key = hashlib.sha1()
+    key.update(np.ascontiguousarray(da[da.rio.y_dim].values).tobytes())
+    key.update(np.ascontiguousarray(da[da.rio.x_dim].values).tobytes())
+    key.update(b"".join(geo_df.geometry.to_wkb()))
+    key.update(str(da.rio.crs).encode())
+    key = key.hexdigest()
+
+    if key in _CLIP_MASKS:
+        return _CLIP_MASKS[key]
+
+    mask_path = CLIP_MASKS_PATH / f"{key}.npy"
+    if check_file_existence(mask_path):
+        mask = np.load(mask_path)
+    else:
+        mask = geometry_mask(
+            geometries=geo_df.geometry,
+            out_shape=(int(da.rio.height), int(da.rio.width)),
+            transform=da.rio.transform(recalc=True),
+            invert=True,
+        )
+        try:
+            os.makedirs(CLIP_MASKS_PATH, exist_ok=True)
+            np.save(mask_path, mask)
+        except OSError:
+            print(f"Could not save the clip mask to {CLIP_MASKS_PATH}, keeping it in memory only")
+
+    _CLIP_MASKS[key] = mask
+    return mask
+
+
+def clip_dataarray(
+    da: xarray.DataArray, geo_df: gpd.GeoDataFrame, use_cache: bool = True
+) -> xarray.DataArray:
     """
     Clip a DataArray based on the shape of a GeoDataFrame.
 
     Parameters:
     - da (xarray.DataArray): The input DataArray.
     - geo_df (gpd.GeoDataFrame): The GeoDataFrame to use for clipping.
+    - use_cache (bool, optional): If True, mask with the cached clip mask of the grid (see 'clip_mask')
+                                  and crop to its extent. If False, use rio.clip. Both give the same result.
+                                  Defaults to True.
 
     Returns:
     - xarray.DataArray: The clipped DataArray.
     """
-    return da.rio.clip(geo_df.geometry)
+    if not use_cache:
+        return da.rio.clip(geo_df.geometry)
+
+    mask = clip_mask(da=da, geo_df=geo_df)
+    if not mask.any():
+        raise ValueError("No data found in bounds of the clipping geometries.")
+
+    y_dim, x_dim = da.rio.y_dim, da.rio.x_dim
+    y_indices, x_indices = np.flatnonzero(mask.any(axis=1)), np.flatnonzero(mask.any(axis=0))
+    window = {
+        y_dim: slice(y_indices[0], y_indices[-1] + 1),
+        x_dim: slice(x_indices[0], x_indices[-1] + 1),
+    }
+    clipped_da = da.where(xarray.DataArray(mask, dims=(y_dim, x_dim))).isel(window)
+    clipped_da.rio.write_transform(clipped_da.rio.transform(recalc=True), inplace=True)
+    clipped_da.rio.write_coordinate_system(inplace=True)
+    return clipped_da.astype(da.dtype)
 
 
 def plot_heatmap_grid_on_map(
@@ -801,6 +1763,51 @@ def plot_heatmap_grid_on_map(
     return fig
 
 
+def interpolate_data_cube(
+    df: gpd.GeoDataFrame,
+    geo_df: gpd.GeoDataFrame,
+    value_col: str,
+    lat_res: float = 0.1,
+    lon_res: float = 0.1,
+    method: str = "linear",
+    epsg: int = 4326,
+):
+    """
+    Interpolates weather data for all dates at once and clips it to a specified geographical region.
+
+    The whole DataFrame is pivoted to a (date, y, x) DataArray and interpolated with a single call.
+    The clip mask is computed once on the interpolated grid and applied to every date.
+    Parameters and output are the same as in the 'interpolate_data_for_all_dates' function.
+    """
+    if geo_df.crs.to_epsg() != epsg:
+        raise ValueError(
+            f"The map crs and desired weather crs don't match: {geo_df.crs.to_epsg()} != {epsg}"
+        )
+
+    da = (
+        df.assign(x=df.lon, y=df.lat)
+        .set_index(["date", "y", "x"])[value_col]
+        .to_xarray()
+        .reindex(date=df["date"].unique())
+    )
+    da.rio.write_crs(f"EPSG:{epsg}", inplace=True)
+    upsampled_da = xarray_upsample(
+        da=da, lat_res=lat_res, lon_res=lon_res, method=method
+    )
+
+    # Clip a single date of the grid and reuse its mask for every date
+    clipped_grid = clip_dataarray(
+        da=xarray.ones_like(upsampled_da.isel(date=0, drop=True)), geo_df=geo_df
+    )
+    clipped_upsampled_da = upsampled_da.sel(y=clipped_grid.y, x=clipped_grid.x).where(
+        clipped_grid.notnull()
+    )
+
+    df = clipped_upsampled_da.to_dataframe().dropna(subset=[value_col]).reset_index()
+    df.rename(columns={"x": "lon", "y": "lat"}, inplace=True)
+    return df[["lat", "lon", value_col, "date"]]
+
+
 def interpolate_data_for_all_dates(
     df: gpd.GeoDataFrame,
     geo_df: gpd.GeoDataFrame,
@@ -809,17 +1816,61 @@ def interpolate_data_for_all_dates(
     lon_res: float = 0.1,
     method: str = "linear",
     epsg: int = 4326,
+    cube: bool = True,
+    engine: str = "pandas",
+    output_path: Optional[str] = None,
 ):
     """
     Interpolates weather data for each unique date in the DataFrame.
 
-    Parameters are the same as in the 'interpolate_data' function.
+    Parameters are the same as in the 'interpolate_data' function, plus:
+
+    cube : bool, optional
+        If True, interpolate and clip all dates at once with 'interpolate_data_cube'.
+        If False, run 'interpolate_data' for each date separately. Defaults to True.
+
+    engine : str, optional
+        "pandas" interpolates the df DataFrame. "partitioned" reads df as a Parquet dataset (path or pyarrow
+        dataset) one year at a time and appends the interpolated years to output_path. Defaults to "pandas".
+
+    output_path : str, optional
+        Output dataset of the "partitioned" engine. Defaults to None.
 
     Returns:
     -------
     pd.DataFrame
         A DataFrame with interpolated weather data for all dates, clipped to the specified region.
+        With the "partitioned" engine, the pyarrow dataset written to output_path.
     """
+    if check_engine(engine, output_path):
+        dataset = open_weather_dataset(df)
+        for year in dataset_years(dataset):
+            interpolated_df = interpolate_data_for_all_dates(
+                df=read_dataset_year(dataset, year),
+                geo_df=geo_df,
+                value_col=value_col,
+                lat_res=lat_res,
+                lon_res=lon_res,
+                method=method,
+                epsg=epsg,
+                cube=cube,
+            )
+            print(f"  {'=' * 3 } Year {year} | {interpolated_df.shape[0]} interpolated points")
+            interpolated_df["year"] = year
+            append_to_dataset(interpolated_df, output_path, f"year-{year}")
+        return open_weather_dataset(output_path)
+
+    if cube:
+        return interpolate_data_cube(
+            df=df,
+            geo_df=geo_df,
+            value_col=value_col,
+            lat_res=lat_res,
+            lon_res=lon_res,
+            method=method,
+            epsg=epsg,
+        )
+
     # List to store dataframes after interpolation for each date
     dfs = []
 
@@ -1,16 +1,74 @@
+import hashlib
+import os
 import numpy as np
 import datetime
 import pandas as pd
 import geopandas as gpd
 from sklearn.neighbors import NearestNeighbors
 from src.survey.helper import export_fn
+from src.weather.constants import WEATHER_AGGREGATES_PATH
+from src.weather.utils import grid_index
 from src.weather.weather_pipeline import (
     convert_map_crs,
     convert_point_crs,
+    dissolve_map,
 )
 
+# Nigeria season of every month, indexed by month number (index 0 is unused)
+SEASON_BY_MONTH = np.array(
+    ["", "dry", "dry", "dry", "dry", "wet", "wet", "wet", "wet", "wet", "dry", "dry", "dry"]
+)
+
+# Mean Earth radius, to convert haversine distances from radians to kilometers
+EARTH_RADIUS_KM = 6371.0088
+
+
+def find_nearest_points(hh_df, weather_df, n_neighbors=4, metric="euclidean"):
+    """
+    Query the n nearest weather grid points of each household with a ball tree.
+
+    Parameters:
+    hh_df: DataFrame
+        Household data, including 'lat', 'lon' columns.
+    weather_df: DataFrame
+        Weather grid data, including 'lat', 'lon' columns.
+    n_neighbors: int
+        The number of nearest weather grid points to find for each household.
+    metric: str
+        'euclidean' for distances in degrees of longitude/latitude, or 'haversine' for
+        great-circle distances in kilometers. Default is 'euclidean'.
 
-def get_nearest_points(hh_df, weather_df, n_neighbors=4):
+    Returns:
+    tuple of np.ndarray
+        (n_households, n_neighbors) arrays of distances and of positions in weather_df of the nearest points.
+    """
+    if metric == "euclidean":
+        nbrs = NearestNeighbors(n_neighbors=n_neighbors, algorithm="ball_tree")
+        nbrs.fit(weather_df[["lon", "lat"]])
+        return nbrs.kneighbors(hh_df[["lon", "lat"]])
+    if metric == "haversine":
+        nbrs = NearestNeighbors(n_neighbors=n_neighbors, algorithm="ball_tree", metric="haversine")
+        nbrs.fit(np.radians(weather_df[["lat", "lon"]].to_numpy(dtype=float)))
+        distances, indices = nbrs.kneighbors(np.radians(hh_df[["lat", "lon"]].to_numpy(dtype=float)))
+        return distances * EARTH_RADIUS_KM, indices
+    raise ValueError(f"Unknown metric {metric}, use 'euclidean' or 'haversine'")
+
+
+def check_max_distance_metric(metric, max_distance_km):
+    """
+    Check that a distance cutoff in kilometers can be applied to the distances of a metric.
+
+    Parameters:
+    metric: str
+        The metric of the nearest points search, see find_nearest_points().
+    max_distance_km: float or None
+        The distance cutoff in kilometers.
+    """
+    if max_distance_km is not None and metric != "haversine":
+        raise ValueError("max_distance_km requires metric='haversine', euclidean distances are in degrees")
+
+
+def get_nearest_points(hh_df, weather_df, n_neighbors=4, metric="euclidean"):
     """
     For each household, find the n nearest points in the weather grid.
 
@@ -21,6 +79,8 @@ def get_nearest_points(hh_df, weather_df, n_neighbors=4):
         Weather grid data, including 'lat', 'lon' columns.
     n_neighbors: int
         The number of nearest weather grid points to find for each household.
+    metric: str
+        'euclidean' (degrees) or 'haversine' (kilometers), see find_nearest_points().
 
     Returns:
     DataFrame
@@ -28,14 +88,8 @@ def get_nearest_points(hh_df, weather_df, n_neighbors=4):
         'nearest_points' - list of indices of the nearest points in weather_df,
         'distances' - list of distances to the nearest points.
     """
-    # Create a NearestNeighbors model
-    nbrs = NearestNeighbors(n_neighbors=n_neighbors, algorithm="ball_tree")
-
-    # Fit the model to the weather grid data
-    nbrs.fit(weather_df[["lon", "lat"]])
-
     # Find the nearest weather grid points for each household
-    distances, indices = nbrs.kneighbors(hh_df[["lon", "lat"]])
+    distances, indices = find_nearest_points(hh_df, weather_df, n_neighbors, metric)
 
     # Create a new DataFrame with the results
     nearest_df = pd.DataFrame(
@@ -46,28 +100,112 @@ def get_nearest_points(hh_df, weather_df, n_neighbors=4):
     return nearest_df
 
 
-def calculate_weights(nearest_df):
+def idw_weights(distances, max_distance=None):
+    """
+    Calculate the normalized inverse distance weights of the nearest points.
+
+    Parameters:
+    distances: np.ndarray
+        (n_households, n_neighbors) array of distances to the nearest points, as returned by kneighbors.
+    max_distance: float, optional
+        Points further than max_distance get no weight, in the unit of distances.
+
+    Returns:
+    np.ndarray
+        (n_households, n_neighbors) array of weights summing to 1 per household. When a household sits
+        exactly on one or more points, these points share the weight and the others get none. Households
+        without any point within max_distance get NaN weights.
+    """
+    distances = np.asarray(distances, dtype=float)
+    exact_hits = distances == 0
+    with np.errstate(divide="ignore"):
+        weights = np.where(exact_hits.any(axis=1, keepdims=True), exact_hits, 1 / distances)
+    if max_distance is not None:
+        weights = np.where(distances <= max_distance, weights, 0)
+    with np.errstate(invalid="ignore"):
+        return weights / weights.sum(axis=1, keepdims=True)
+
+
+def idw_interpolate(indices, distances, values, max_distance=None):
+    """
+    Inverse distance weighting interpolation of values on the nearest points.
+
+    Parameters:
+    indices: np.ndarray
+        (n_households, n_neighbors) array of positions of the nearest points in values, as returned by kneighbors.
+    distances: np.ndarray
+        (n_households, n_neighbors) array of distances to the nearest points, as returned by kneighbors.
+    values: np.ndarray
+        (n_points, n_values) array of the values to interpolate.
+    max_distance: float, optional
+        Points further than max_distance are not used, see idw_weights().
+
+    Returns:
+    np.ndarray
+        (n_households, n_values) array of interpolated values, NaN for households without points within max_distance.
+    """
+    weights = idw_weights(distances, max_distance)
+    return np.einsum("hk,hkv->hv", weights, np.asarray(values, dtype=float)[indices])
+
+
+def interpolate_nearest_values(
+    hh_df, weather_df, value_cols, n_neighbors=4, metric="euclidean", max_distance_km=None
+):
+    """
+    Interpolate the values of the n nearest weather grid points for each household.
+
+    Parameters:
+    hh_df: DataFrame
+        Household data, including 'lat', 'lon' columns.
+    weather_df: DataFrame
+        Weather grid data, including 'lat', 'lon' and value_cols columns.
+    value_cols: list of str
+        The names of the columns in weather_df that contains the values to interpolate.
+    n_neighbors: int
+        The number of nearest weather grid points to use for interpolation.
+    metric: str
+        'euclidean' (degrees) or 'haversine' (kilometers), see find_nearest_points().
+    max_distance_km: float, optional
+        Grid points further than max_distance_km are not used, households without any get NaN.
+        Requires metric='haversine'.
+
+    Returns:
+    DataFrame
+        A new DataFrame with the same index as hh_df and the interpolated values for each household.
+    """
+    if isinstance(value_cols, str):
+        value_cols = [value_cols]
+    check_max_distance_metric(metric, max_distance_km)
+
+    distances, indices = find_nearest_points(hh_df, weather_df, n_neighbors, metric)
+
+    interpolated_values = idw_interpolate(
+        indices,
+        distances,
+        weather_df[value_cols].to_numpy(dtype=float, na_value=np.nan),
+        max_distance_km,
+    )
+    return pd.DataFrame(interpolated_values, columns=value_cols, index=hh_df.index)
+
+
+def calculate_weights(nearest_df, max_distance=None):
     """
     Calculate the weights for the inverse distance weighting interpolation.
 
     Parameters:
     nearest_df: DataFrame
         DataFrame with 'nearest_points' and 'distances' columns, as returned by get_nearest_points().
+    max_distance: float, optional
+        Points further than max_distance get no weight, in the unit of the distances.
 
     Returns:
     DataFrame
         A new DataFrame with the same index as nearest_df, and with an additional column 'weights'.
     """
-    # Calculate the weights based on the inverse of the distance
-    weights = nearest_df["distances"].apply(
-        lambda distances: [1 / d for d in distances]
-    )
-
-    # Normalize the weights so that they sum to 1
-    weights = weights.apply(lambda weights: [w / sum(weights) for w in weights])
+    weights = idw_weights(np.array(nearest_df["distances"].tolist()), max_distance)
 
     # Add the weights to the DataFrame
-    nearest_df["weights"] = weights
+    nearest_df["weights"] = weights.tolist()
 
     return nearest_df
 
@@ -91,24 +229,15 @@ def interpolate_values(weighted_nearest_df, weather_df, value_cols):
     if isinstance(value_cols, str):
         value_cols = [value_cols]
 
-    interpolated_values = []
-
-    # Iterate over each row in the DataFrame
-    for idx, row in weighted_nearest_df.iterrows():
-        # Get the indices of the nearest points
-        nearest_indices = row["nearest_points"]
-
-        # Get the weights for the interpolation
-        weights = row["weights"]
-
-        # Get the corresponding values from the weather DataFrame
-        values = weather_df.loc[nearest_indices, value_cols]
-
-        # Calculate the interpolated values as the weighted average of the values
-        interpolated_row_values = np.average(values, weights=weights, axis=0)
-
-        # Append the dictionary to the list
-        interpolated_values.append(interpolated_row_values)
+    # Gather the values of all nearest points at once and take their weighted average
+    indices = weather_df.index.get_indexer(
+        np.array(weighted_nearest_df["nearest_points"].tolist()).ravel()
+    ).reshape(len(weighted_nearest_df), -1)
+    if (indices < 0).any():
+        raise KeyError("Some nearest points are not in the index of weather_df")
+    values = weather_df[value_cols].to_numpy(dtype=float, na_value=np.nan)[indices]
+    weights = np.array(weighted_nearest_df["weights"].tolist())
+    interpolated_values = np.einsum("hk,hkv->hv", weights, values)
 
     # Create a new DataFrame with the interpolated values
     interpolated_df = pd.DataFrame(
@@ -118,129 +247,227 @@ def interpolate_values(weighted_nearest_df, weather_df, value_cols):
     return interpolated_df
 
 
-def get_weather_for_household_survey(
-    household_df, weather_df, value_col, n_neighbors=4
+def build_grid_neighbors(
+    hh_df, weather_df, n_neighbors=4, metric="euclidean", max_distance_km=None
 ):
     """
-    Get the interpolated weather data for each household on the day of the survey.
+    Find the n nearest weather grid points of each household once, for all dates.
+
+    The neighbors are searched among the unique (lon, lat) points of weather_df, so the
+    same neighbors and weights can be used to interpolate any date, month, season or year,
+    from weather_df or from its aggregates (see compute_weather_aggregates()).
 
     Parameters:
-    household_df: DataFrame
-        Household survey data, including 'date', 'lat', 'lon' columns.
+    hh_df: DataFrame
+        Household data, including 'lat', 'lon' columns.
     weather_df: DataFrame
-        Daily weather data, including 'date', 'lat', 'lon' and 'precipitation' columns.
-    value_col: str
-        The name of the column in weather_df that contains the values to interpolate.
+        Weather grid data, including 'lat', 'lon' columns, usually with one row per grid point and date.
     n_neighbors: int
-        The number of nearest weather points to use for interpolation.
+        The number of nearest weather grid points to find for each household.
+    metric: str
+        'euclidean' (degrees) or 'haversine' (kilometers), see find_nearest_points().
+    max_distance_km: float, optional
+        Grid points further than max_distance_km get no weight, households without any get NaN values.
+        Requires metric='haversine'.
 
     Returns:
-    DataFrame
-        A new DataFrame with the interpolated weather data for each household.
+    dict
+        'lons', 'lats' - unique longitudes and latitudes of the grid points,
+        'grid_table' - (n_lons, n_lats) grid id of every (lon, lat) pair, -1 if not a grid point,
+        'n_grid' - number of unique grid points,
+        'neighbors' - (n_households, n_neighbors) grid ids of the nearest points,
+        'weights' - (n_households, n_neighbors) inverse distance weights of the nearest points,
+        'index' - index of hh_df.
     """
-    hh_df = household_df.copy()
-    interpolated_dfs = []  # List to store the interpolated data for each date
-
-    # Loop over unique dates in the household survey data
-    for date in hh_df["date"].unique():
-        # Select the household surveys for this date
-        hh_df_date = hh_df[hh_df["date"] == date]
+    weather_grid_ids, _ = grid_index(weather_df, ["lon", "lat"])
+    _, first_rows = np.unique(weather_grid_ids, return_index=True)
+    grid_points = weather_df[["lon", "lat"]].iloc[first_rows]
+
+    lons = pd.Index(pd.unique(grid_points["lon"]))
+    lats = pd.Index(pd.unique(grid_points["lat"]))
+    grid_table = np.full((len(lons), len(lats)), -1)
+    grid_table[
+        lons.get_indexer(grid_points["lon"]), lats.get_indexer(grid_points["lat"])
+    ] = np.arange(len(first_rows))
+
+    check_max_distance_metric(metric, max_distance_km)
+    distances, indices = find_nearest_points(hh_df, grid_points, n_neighbors, metric)
+
+    return {
+        "lons": lons,
+        "lats": lats,
+        "grid_table": grid_table,
+        "n_grid": len(first_rows),
+        "neighbors": indices,
+        "weights": idw_weights(distances, max_distance_km),
+        "index": hh_df.index,
+    }
+
+
+def lookup_grid_ids(grid_neighbors, weather_df):
+    """
+    Find the grid id of every row of a weather DataFrame.
 
-        # Select the weather data for this date and reset index
-        weather_df_date = weather_df[weather_df["date"] == date].reset_index(drop=True)
+    Parameters:
+    grid_neighbors: dict
+        The nearest grid points of the households, as returned by build_grid_neighbors().
+    weather_df: DataFrame
+        Weather data on the same grid, including 'lat', 'lon' columns.
 
-        if len(weather_df_date) == 0:
-            print(f"WARNING: For the date {date} there is no weather data!")
+    Returns:
+    np.ndarray
+        The grid id of every row, -1 for the rows that are not on a grid point.
+    """
+    lon_ids = grid_neighbors["lons"].get_indexer(weather_df["lon"])
+    lat_ids = grid_neighbors["lats"].get_indexer(weather_df["lat"])
+    grid_ids = grid_neighbors["grid_table"][lon_ids, lat_ids]
+    grid_ids[(lon_ids < 0) | (lat_ids < 0)] = -1
+    return grid_ids
 
-        
 
-        # Calculate the nearest points and distances
-        nearest_df = get_nearest_points(hh_df_date, weather_df_date, n_neighbors)
+def interpolate_periods(grid_neighbors, weather_df, value_cols, weather_periods, hh_periods):
+    """
+    Interpolate the weather values of the period of each household from its nearest grid points.
 
-        # Calculate the weights for interpolation
-        weighted_nearest_df = calculate_weights(nearest_df)
+    The values are averaged per (period, grid point) into a dense period-by-grid array, which is
+    then looked up with the households' periods and neighbors.
 
-        # Interpolate the weather data
-        interpolated_df_date = interpolate_values(
-            weighted_nearest_df, weather_df_date, value_col
-        )
+    Parameters:
+    grid_neighbors: dict
+        The nearest grid points of the households, as returned by build_grid_neighbors().
+    weather_df: DataFrame
+        The weather DataFrame with the values to interpolate, on the grid used in build_grid_neighbors().
+    value_cols: list of str
+        The names of the columns in weather_df that contains the values to interpolate.
+    weather_periods: array-like
+        The period (e.g. date, or year and month code) of every row of weather_df.
+    hh_periods: array-like
+        The period of every household, comparable with weather_periods.
 
-        # Append the interpolated data for this date to the list
-        interpolated_dfs.append(interpolated_df_date)
+    Returns:
+    DataFrame
+        A new DataFrame with the same index as the households and the interpolated values.
+    """
+    if isinstance(value_cols, str):
+        value_cols = [value_cols]
 
-    # Concatenate the interpolated data for all dates
-    interpolated_df = pd.concat(interpolated_dfs)
+    period_ids, periods = pd.factorize(np.asarray(weather_periods))
+    hh_period_ids = pd.Index(periods).get_indexer(np.asarray(hh_periods))
+    for missing_period in pd.unique(np.asarray(hh_periods)[hh_period_ids < 0]):
+        print(f"WARNING: For the period {missing_period} there is no weather data!")
+
+    n_grid = grid_neighbors["n_grid"]
+    n_cells = len(periods) * n_grid
+    weather_grid_ids = lookup_grid_ids(grid_neighbors, weather_df)
+    cells = period_ids * n_grid + weather_grid_ids
+
+    # Mean of every value column per (period, grid point), missing values are skipped
+    period_values = np.empty((n_cells, len(value_cols)))
+    values = weather_df[value_cols].to_numpy(dtype=float, na_value=np.nan)
+    for col_indx in range(len(value_cols)):
+        valid = ~np.isnan(values[:, col_indx]) & (weather_grid_ids >= 0)
+        sums = np.bincount(cells[valid], weights=values[valid, col_indx], minlength=n_cells)
+        counts = np.bincount(cells[valid], minlength=n_cells)
+        with np.errstate(invalid="ignore"):
+            period_values[:, col_indx] = sums / counts
+
+    # Gather all columns of the neighbors of every household at once
+    interpolated_values = np.full((len(hh_period_ids), len(value_cols)), np.nan)
+    found = hh_period_ids >= 0
+    neighbor_cells = hh_period_ids[found, None] * n_grid + grid_neighbors["neighbors"][found]
+    interpolated_values[found] = np.einsum(
+        "hk,hkv->hv", grid_neighbors["weights"][found], period_values[neighbor_cells]
+    )
 
-    return interpolated_df
+    return pd.DataFrame(
+        interpolated_values, columns=value_cols, index=grid_neighbors["index"]
+    )
 
 
-def get_monthly_weather_for_household_survey(
-    household_df, weather_df, value_col, n_neighbors=4
+def get_weather_for_household_survey(
+    household_df, weather_df, value_col, n_neighbors=4, grid_neighbors=None
 ):
     """
-    Get the interpolated weather data for each household for the month of the survey.
+    Get the interpolated weather data for each household on the day of the survey.
 
     Parameters:
     household_df: DataFrame
         Household survey data, including 'date', 'lat', 'lon' columns.
     weather_df: DataFrame
-        Monthly weather data, including 'year', 'month', 'lat', 'lon' and 'precipitation' columns.
-    value_col: str
-        The name of the column in weather_df that contains the values to interpolate.
+        Daily weather data, including 'date', 'lat', 'lon' and 'precipitation' columns.
+    value_col: str or list of str
+        The name of the column(s) in weather_df that contains the values to interpolate.
     n_neighbors: int
         The number of nearest weather points to use for interpolation.
+    grid_neighbors: dict, optional
+        The nearest grid points of the households, as returned by build_grid_neighbors().
+        Computed from household_df and weather_df if not given.
 
     Returns:
     DataFrame
         A new DataFrame with the interpolated weather data for each household.
     """
-    hh_df = household_df.copy()
-    interpolated_dfs = []  # List to store the interpolated data for each date
-    col_name = "monthly_avg_" + value_col
-
-    # Extract year and month from the household survey data
-    hh_df["year"] = hh_df["date"].dt.year
-    hh_df["month"] = hh_df["date"].dt.month
-
-    # Loop over unique year-month pairs in the household survey data
-    for year, month in hh_df[["year", "month"]].drop_duplicates().values:
-        # Select the household surveys for this month
-        hh_df_month = hh_df[(hh_df["year"] == year) & (hh_df["month"] == month)]
+    value_cols = [value_col] if isinstance(value_col, str) else list(value_col)
+    if grid_neighbors is None:
+        grid_neighbors = build_grid_neighbors(household_df, weather_df, n_neighbors)
 
-        # Select the weather data for this month and reset index
-        weather_df_month = weather_df[
-            (weather_df["year"] == year) & (weather_df["month"] == month)
-        ].reset_index(drop=True)
+    interpolated_df = interpolate_periods(
+        grid_neighbors,
+        weather_df,
+        value_cols,
+        weather_periods=weather_df["date"],
+        hh_periods=household_df["date"],
+    )
 
-        # Calculate the nearest points and distances
-        nearest_df = get_nearest_points(hh_df_month, weather_df_month, n_neighbors)
+    return interpolated_df
 
-        # Calculate the weights for interpolation
-        weighted_nearest_df = calculate_weights(nearest_df)
 
-        # Interpolate the weather data
-        interpolated_df_month = interpolate_values(
-            weighted_nearest_df, weather_df_month, value_col
-        )
+def get_monthly_weather_for_household_survey(
+    household_df, weather_df, value_col, n_neighbors=4, grid_neighbors=None
+):
+    """
+    Get the interpolated weather data for each household for the month of the survey.
 
-        # Add the year and month columns to the interpolated data
-        # interpolated_df_month['year'] = year
-        # interpolated_df_month['month'] = month
+    Parameters:
+    household_df: DataFrame
+        Household survey data, including 'date', 'lat', 'lon' columns.
+    weather_df: DataFrame
+        Monthly weather data, including 'year', 'month', 'lat', 'lon' and 'precipitation' columns.
+    value_col: str or list of str
+        The name of the column(s) in weather_df that contains the values to interpolate.
+    n_neighbors: int
+        The number of nearest weather points to use for interpolation.
+    grid_neighbors: dict, optional
+        The nearest grid points of the households, as returned by build_grid_neighbors().
+        Computed from household_df and weather_df if not given.
 
-        # Append the interpolated data for this month to the list
-        interpolated_dfs.append(interpolated_df_month)
+    Returns:
+    DataFrame
+        A new DataFrame with the interpolated weather data for each household.
+    """
+    value_cols = [value_col] if isinstance(value_col, str) else list(value_col)
+    if grid_neighbors is None:
+        grid_neighbors = build_grid_neighbors(household_df, weather_df, n_neighbors)
 
-    # Concatenate the interpolated data for all months
-    interpolated_df = pd.concat(interpolated_dfs)
+    # Values are averaged per month and grid point before the interpolation
+    interpolated_df = interpolate_periods(
+        grid_neighbors,
+        weather_df,
+        value_cols,
+        weather_periods=weather_df["year"] * 12 + weather_df["month"],
+        hh_periods=household_df["date"].dt.year * 12 + household_df["date"].dt.month,
+    )
 
     # Change column name
-    interpolated_df.rename(columns={value_col: col_name}, inplace=True)
+    interpolated_df.rename(
+        columns={col: "monthly_avg_" + col for col in value_cols}, inplace=True
+    )
 
     return interpolated_df
 
 
 def get_seasonal_weather_for_household_survey(
-    household_df, weather_df, value_col, n_neighbors=4
+    household_df, weather_df, value_col, n_neighbors=4, grid_neighbors=None
 ):
     """
     Get the interpolated weather data for each household for the season of the survey.
@@ -249,113 +476,48 @@ def get_seasonal_weather_for_household_survey(
     household_df: DataFrame
         Household survey data, including 'date', 'lat', 'lon' columns.
     weather_df: DataFrame
-        Seasonal weather data, including 'year', 'season', 'lat', 'lon' and 'precipitation' columns.
-    value_col: str
+        Weather data, including 'year', 'month' (or 'season' for seasonal aggregates), 'lat', 'lon' and 'precipitation' columns.
+    value_col: str or list of str
         The name of the column(s) in weather_df that contains the values to interpolate.
     n_neighbors: int
         The number of nearest weather points to use for interpolation.
+    grid_neighbors: dict, optional
+        The nearest grid points of the households, as returned by build_grid_neighbors().
+        Computed from household_df and weather_df if not given.
 
     Returns:
     DataFrame
         A new DataFrame with the interpolated weather data for each household.
     """
-
-    def assign_season(date):
-        """
-        Assign a season to a date.
-
-        Parameters:
-        date: datetime
-            The date to assign a season to.
-
-        Returns:
-        str
-            The season ('winter', 'spring', 'summer', 'fall') that the date falls in.
-        """
-        month = date.month
-
-        if 3 <= month <= 5:
-            return "spring"
-        elif 6 <= month <= 8:
-            return "summer"
-        elif 9 <= month <= 11:
-            return "fall"
-        else:
-            return "winter"
-        
-    def assign_season_nigeria(date: datetime) -> str:
-        """
-        Assign a season to a date (Nigeria specific).
-
-        Parameters:
-        date: datetime
-            The date to assign a season to.
-
-        Returns:
-        str
-            The season ('wet' or 'dry') that the date falls in.
-        """
-        month = date.month
-
-        if month in [5,6,7,8,9]:
-            return "wet"
-        else:
-            return "dry"
-
-    interpolated_dfs = []  # List to store the interpolated data for each date
-    col_name = (
-        "seasonal_avg_" + value_col
-    )  # Tracking column names to rename column in finished df
-
-    # Extract year and season from the household survey data
-    hh_df = household_df.copy()
-    hh_df["year"] = hh_df["date"].dt.year
-    hh_df["date"] = hh_df["date"].dt.date
-    hh_df["season"] = hh_df["date"].apply(assign_season_nigeria)
-
-    # Extract season from weather data
-    weather_df["date"] = weather_df["date"].dt.date
-    weather_df["season"] = weather_df["date"].apply(assign_season_nigeria)
-
-    # Loop over unique year-season pairs in the household survey data
-    for year, season in hh_df[["year", "season"]].drop_duplicates().values:
-        # Select the household surveys for this season
-        hh_df_season = hh_df[(hh_df["year"] == year) & (hh_df["season"] == season)]
-
-        # Select the weather data for this season and reset index
-        weather_df_season = weather_df[
-            (weather_df["year"] == year) & (weather_df["season"] == season)
-        ].reset_index(drop=True)
-
-        # Calculate the nearest points and distances
-        nearest_df = get_nearest_points(hh_df_season, weather_df_season, n_neighbors)
-
-        # Calculate the weights for interpolation
-        weighted_nearest_df = calculate_weights(nearest_df)
-
-        # Interpolate the weather data
-        interpolated_df_season = interpolate_values(
-            weighted_nearest_df, weather_df_season, value_col
-        )
-
-        # Add the year and season columns to the interpolated data
-        # interpolated_df_season['year'] = year
-        interpolated_df_season["season"] = season
-
-        # Append the interpolated data for this season to the list
-        interpolated_dfs.append(interpolated_df_season)
-
-    # Concatenate the interpolated data for all seasons
-    interpolated_df = pd.concat(interpolated_dfs)
+    value_cols = [value_col] if isinstance(value_col, str) else list(value_col)
+    if grid_neighbors is None:
+        grid_neighbors = build_grid_neighbors(household_df, weather_df, n_neighbors)
+
+    # Values are averaged per year, season and grid point before the interpolation
+    hh_season = SEASON_BY_MONTH[household_df["date"].dt.month.to_numpy()]
+    if "month" in weather_df.columns:
+        weather_season = SEASON_BY_MONTH[weather_df["month"].to_numpy()]
+    else:
+        weather_season = weather_df["season"].to_numpy()
+    interpolated_df = interpolate_periods(
+        grid_neighbors,
+        weather_df,
+        value_cols,
+        weather_periods=weather_df["year"].to_numpy() * 2 + (weather_season == "wet"),
+        hh_periods=household_df["date"].dt.year.to_numpy() * 2 + (hh_season == "wet"),
+    )
+    interpolated_df["season"] = hh_season
 
     # Change column name
-    interpolated_df.rename(columns={value_col: col_name}, inplace=True)
+    interpolated_df.rename(
+        columns={col: "seasonal_avg_" + col for col in value_cols}, inplace=True
+    )
 
     return interpolated_df
 
 
 def get_yearly_weather_for_household_survey(
-    household_df, weather_df, value_col, n_neighbors=4
+    household_df, weather_df, value_col, n_neighbors=4, grid_neighbors=None
 ):
     """
     Get the interpolated weather data for each household for the year of the survey.
@@ -365,60 +527,165 @@ def get_yearly_weather_for_household_survey(
         Household survey data, including 'date', 'lat', 'lon' columns.
     weather_df: DataFrame
         Yearly weather data, including 'year', 'lat', 'lon' and 'precipitation' columns.
-    value_col: str
+    value_col: str or list of str
         The name of the column(s) in weather_df that contains the values to interpolate.
     n_neighbors: int
         The number of nearest weather points to use for interpolation.
+    grid_neighbors: dict, optional
+        The nearest grid points of the households, as returned by build_grid_neighbors().
+        Computed from household_df and weather_df if not given.
 
     Returns:
     DataFrame
         A new DataFrame with the interpolated weather data for each household.
     """
-    interpolated_dfs = []  # List to store the interpolated data for each date
-    hh_df = household_df.copy()
-    col_name = "yearly_avg_" + value_col
+    value_cols = [value_col] if isinstance(value_col, str) else list(value_col)
+    if grid_neighbors is None:
+        grid_neighbors = build_grid_neighbors(household_df, weather_df, n_neighbors)
 
-    # Extract year from the household survey data
-    hh_df["year"] = hh_df["date"].dt.year
+    # Values are averaged per year and grid point before the interpolation
+    interpolated_df = interpolate_periods(
+        grid_neighbors,
+        weather_df,
+        value_cols,
+        weather_periods=weather_df["year"],
+        hh_periods=household_df["date"].dt.year,
+    )
 
-    # Loop over unique years in the household survey data
-    for year in hh_df["year"].unique():
-        # Select the household surveys for this year
-        hh_df_year = hh_df[hh_df["year"] == year]
+    # Change column name
+    interpolated_df.rename(
+        columns={col: "yearly_avg_" + col for col in value_cols}, inplace=True
+    )
 
-        # Select the weather data for this year and reset index
-        weather_df_year = weather_df[weather_df["year"] == year].reset_index(drop=True)
+    return interpolated_df
 
-        # Calculate the nearest points and distances
-        nearest_df = get_nearest_points(hh_df_year, weather_df_year, n_neighbors)
 
-        # Calculate the weights for interpolation
-        weighted_nearest_df = calculate_weights(nearest_df)
+def compute_weather_aggregates(weather_df, value_cols):
+    """
+    Compute the monthly, seasonal and yearly means of weather values per grid point.
 
-        # Interpolate the weather data
-        interpolated_df_year = interpolate_values(
-            weighted_nearest_df, weather_df_year, value_col
-        )
+    The table is grouped once per (grid point, year, month); the seasonal and yearly means are
+    combined from the monthly sums and counts, so they are means over all the days of the period.
 
-        # Add the year column to the interpolated data
-        # interpolated_df_year["year"] = year
+    Parameters:
+    weather_df: DataFrame
+        Daily weather data, including 'lat', 'lon', 'year', 'month' and value_cols columns.
+    value_cols: list of str
+        The names of the columns in weather_df to aggregate.
 
-        # Append the interpolated data for this year to the list
-        interpolated_dfs.append(interpolated_df_year)
+    Returns:
+    dict
+        'monthly', 'seasonal' and 'yearly' DataFrames with 'lon', 'lat', 'year', the period column
+        ('month' or 'season') and the mean of every value column.
+    """
+    if isinstance(value_cols, str):
+        value_cols = [value_cols]
 
-    # Concatenate the interpolated data for all years
-    interpolated_df = pd.concat(interpolated_dfs)
+    monthly_groups = weather_df.groupby(["lon", "lat", "year", "month"])[value_cols]
+    monthly = monthly_groups.sum().add_suffix("_sum")
+    monthly = monthly.join(monthly_groups.count().add_suffix("_count")).reset_index()
+    monthly["season"] = SEASON_BY_MONTH[monthly["month"].to_numpy()]
+    total_cols = [f"{value_col}_{total}" for value_col in value_cols for total in ["sum", "count"]]
+
+    aggregates = {}
+    for timescale, period_cols in [
+        ("monthly", ["month"]),
+        ("seasonal", ["season"]),
+        ("yearly", []),
+    ]:
+        keys = ["lon", "lat", "year"] + period_cols
+        totals = monthly.groupby(keys, sort=False)[total_cols].sum()
+        means = pd.DataFrame(index=totals.index)
+        for value_col in value_cols:
+            means[value_col] = totals[f"{value_col}_sum"] / totals[f"{value_col}_count"]
+        aggregates[timescale] = means.reset_index()
+
+    return aggregates
+
+
+def weather_source_fingerprint(source):
+    """
+    Fingerprint a weather data source, to know when its cached aggregates are outdated.
 
-    # Change column name
-    interpolated_df.rename(columns={value_col: col_name}, inplace=True)
+    Parameters:
+    source: str, Path or file-like
+        Path of the weather file (fingerprinted by path, size and modification time), or the
+        in-memory file it was read from (fingerprinted by its content).
 
-    return interpolated_df
+    Returns:
+    str
+        The hexadecimal fingerprint.
+    """
+    fingerprint = hashlib.sha1()
+    if hasattr(source, "getbuffer"):
+        fingerprint.update(source.getbuffer())
+    else:
+        stat = os.stat(source)
+        fingerprint.update(f"{os.path.abspath(source)}-{stat.st_size}-{stat.st_mtime_ns}".encode())
+    return fingerprint.hexdigest()
+
+
+def load_weather_aggregates(weather_df, value_cols, source, cache_path=WEATHER_AGGREGATES_PATH, years=None):
+    """
+    Get the monthly, seasonal and yearly aggregates of weather_df, cached per source fingerprint.
+
+    Parameters:
+    weather_df: DataFrame
+        Daily weather data read from source, see compute_weather_aggregates().
+    value_cols: list of str
+        The names of the columns in weather_df to aggregate.
+    source: str, Path or file-like
+        The file weather_df was read from, see weather_source_fingerprint().
+    cache_path: str or Path
+        Directory of the cached aggregates. Default is WEATHER_AGGREGATES_PATH.
+    years: list of int, optional
+        The years weather_df was filtered on when read from source (see query_weather). Default is None,
+        for all the years of source.
+
+    Returns:
+    dict
+        'monthly', 'seasonal' and 'yearly' aggregate DataFrames, as returned by compute_weather_aggregates().
+    """
+    if isinstance(value_cols, str):
+        value_cols = [value_cols]
+
+    years = None if years is None else sorted(int(year) for year in years)
+    cache_key = hashlib.sha1(
+        f"{weather_source_fingerprint(source)}-{sorted(value_cols)}-{years}".encode()
+    ).hexdigest()
+    cache_file = f"{cache_path}/{cache_key}.pickle"
+
+    if os.path.exists(cache_file):
+        print(f"Reading cached weather aggregates from {cache_file}")
+        return pd.read_pickle(cache_file)
+
+    aggregates = compute_weather_aggregates(weather_df, value_cols)
+    try:
+        os.makedirs(cache_path, exist_ok=True)
+        pd.to_pickle(aggregates, cache_file)
+    except OSError:
+        print(f"Could not save the weather aggregates to {cache_path}, keeping them in memory only")
+    return aggregates
+
+
+# Household weather functions and the prefix of their output columns, per timescale
+TIMESCALE_FUNCTIONS = {
+    "daily": (get_weather_for_household_survey, ""),
+    "monthly": (get_monthly_weather_for_household_survey, "monthly_avg_"),
+    "seasonal": (get_seasonal_weather_for_household_survey, "seasonal_avg_"),
+    "yearly": (get_yearly_weather_for_household_survey, "yearly_avg_"),
+}
 
 
 def merge_weather_household(
     hh_df,
     weather_df,
     column_name,
+    grid_neighbors=None,
+    timescales=("daily", "monthly"),
+    weather_aggregates=None,
+    metric="euclidean",
+    max_distance_km=None,
 ):
     """
     Merge weather data from different time periods (monthly, seasonal, yearly) for different metrics (precipitation, temperature, etc. )
@@ -430,53 +697,115 @@ def merge_weather_household(
         Household survey data, including 'date', 'lat', 'lon' columns.
     weather_df: DataFrame
         Particular weather dataframe with geographic and weather information to aggregate
+    column_name: str or list of str
+        The weather column(s) to add for each household. All columns are interpolated together.
+    grid_neighbors: dict, optional
+        The nearest grid points of the households, as returned by build_grid_neighbors(). Pass it
+        when merging several columns of the same weather_df to search the neighbors only once.
+    timescales: tuple of str
+        The time periods to add, among 'daily', 'monthly', 'seasonal' and 'yearly'.
+        Default is ('daily', 'monthly').
+    weather_aggregates: dict, optional
+        Precomputed aggregates of weather_df per timescale, as returned by load_weather_aggregates().
+        The timescales found in it are interpolated from the aggregates instead of weather_df.
+    metric: str
+        Distance used to find and weight the nearest grid points when grid_neighbors is not given,
+        'euclidean' (degrees) or 'haversine' (kilometers). Default is 'euclidean'.
+    max_distance_km: float, optional
+        With metric='haversine', grid points further than max_distance_km are not used and
+        households without any get NaN values.
 
     Returns:
     DataFrame
-        A merged DataFrame containing weather data for each household for different time periods and metrics.
-    """
-    
-    # Get weather data for each time period and metric, and rename columns
-    day_agg_survey_df = get_weather_for_household_survey(
-        hh_df, 
-        weather_df, 
-        value_col=column_name
-    )
+        A merged DataFrame containing weather data for each household for different time periods and metrics,
+        with the index of hh_df.
+    """
+    value_cols = [column_name] if isinstance(column_name, str) else list(column_name)
+    unknown_timescales = set(timescales) - set(TIMESCALE_FUNCTIONS)
+    if unknown_timescales:
+        raise ValueError(
+            f"Unknown timescales {sorted(unknown_timescales)}, choose from {list(TIMESCALE_FUNCTIONS)}"
+        )
 
-    monthly_agg_df = get_monthly_weather_for_household_survey(
-        hh_df,
-        weather_df,
-        value_col=column_name
-    )
+    if grid_neighbors is None:
+        grid_neighbors = build_grid_neighbors(
+            hh_df, weather_df, metric=metric, max_distance_km=max_distance_km
+        )
 
-    # For more features, call get_seasonal_weather_for_household_survey & get_yearly_weather_for_household_survey...
-    # Merge all the data together, assuming they have the same index
-    merged_df = pd.concat(
-        [
-            hh_df,
-            day_agg_survey_df,
-            monthly_agg_df
-        ],
-        axis=1,
-    )
+    if weather_aggregates is None:
+        weather_aggregates = {}
 
-    # Add date columns (and drop duplicate season columns)
-    merged_df["month"] = hh_df["date"].dt.month
-    merged_df["year"] = hh_df["date"].dt.year
- 
-    cols = [
-        "lat",
-        "lon",
-        "date",
-        column_name,
-        "monthly_avg_" + column_name,
+    # Get weather data for each time period, for all metrics at once
+    timescale_dfs = [
+        TIMESCALE_FUNCTIONS[timescale][0](
+            hh_df,
+            weather_aggregates.get(timescale, weather_df),
+            value_col=value_cols,
+            grid_neighbors=grid_neighbors,
+        )
+        for timescale in timescales
     ]
 
+    # Merge all the data together, they have the same index
+    merged_df = pd.concat([hh_df[["lat", "lon", "date"]]] + timescale_dfs, axis=1)
+
+    cols = ["lat", "lon", "date"]
+    if "seasonal" in timescales:
+        cols.append("season")
+    for value_col in value_cols:
+        cols += [TIMESCALE_FUNCTIONS[timescale][1] + value_col for timescale in timescales]
+
     merged_df = merged_df[cols]
 
     return merged_df
 
 
+# Declared dtypes of the household weather keys, shared with the survey keys in the merge
+HH_WEATHER_KEY_DTYPES = {"hhid": "int32", "wave": "int32", "visit": "int32"}
+
+
+def read_household_weather(weather_filepath: str) -> pd.DataFrame:
+    """
+    Read the household weather file with typed keys and parsed dates.
+
+    Parameters:
+    weather_filepath: str
+        Path of the household weather file, '.csv' or '.parquet', with 'hhid', 'wave' and 'date' columns.
+
+    Returns:
+    DataFrame
+        The household weather data without duplicated rows.
+    """
+    key_dtypes = {key: HH_WEATHER_KEY_DTYPES[key] for key in ["hhid", "wave"]}
+    if str(weather_filepath).endswith(".parquet"):
+        weather = pd.read_parquet(weather_filepath).astype(key_dtypes)
+        weather["date"] = pd.to_datetime(weather["date"])
+    else:
+        weather = pd.read_csv(weather_filepath, dtype=key_dtypes, parse_dates=["date"])
+    weather = weather.drop_duplicates()  # TODO dont understand why there are still
+    # duplicates being produced in pipeline? or is this just in jama handover csv
+    # file??
+    return weather
+
+
+def assign_visits(weather: pd.DataFrame) -> pd.DataFrame:
+    """
+    Number the visits of each household in each wave: 1 for the first date, 2 for any later date.
+
+    Parameters:
+    weather: DataFrame
+        Household weather data with 'hhid', 'wave' and 'date' columns.
+
+    Returns:
+    DataFrame
+        The data sorted by 'hhid', 'wave' and 'date' with an additional 'visit' column.
+    """
+    weather = weather.sort_values(["hhid", "wave", "date"], kind="stable", ignore_index=True)
+    visit_number = weather.groupby(["hhid", "wave"], sort=False).cumcount() + 1
+    weather["visit"] = np.minimum(visit_number, 2).astype(HH_WEATHER_KEY_DTYPES["visit"])
+    return weather
+
+
 def merge_survey_weather_hh_level(
     survey_filepath: str,
     weather_filepath: str,
@@ -484,42 +813,20 @@ def merge_survey_weather_hh_level(
     export_format: str,
     export_path: str,
 ) -> pd.DataFrame:
-    weather = pd.read_csv(weather_filepath)
-    weather = weather.drop_duplicates()  # TODO dont understand why there are still
-    # duplicates being produced in pipeline? or is this just in jama handover csv
-    # file??
-    weather = weather.convert_dtypes()
-    weather["date"] = pd.to_datetime(weather["date"])
-    weather = weather.set_index(["hhid", "wave", "date"])  # , 'date'
-    weather = weather.sort_index()
+    weather = read_household_weather(weather_filepath)
 
     # Add visit column in the weather data
-    weather["visit"] = 1  # Default fill to visit 1
-
-    visited = set()
-    for current_hhid, current_wave, current_date in weather.index:
-        if (current_hhid, current_wave) not in visited:
-            visited.update(
-                [(current_hhid, current_wave)]
-            )  # Add to visited if already have (hhid, wave)
-            # information
-        else:
-            weather.loc[(current_hhid, current_wave, current_date), "visit"] = 2
-            continue
-    ####
-
-    # Set new index
-    new_index = ["hhid", "wave", "visit"]
-    weather = weather.reset_index()
-    weather = weather.set_index(new_index)
+    weather = assign_visits(weather)
 
     # Survey
     survey = pd.read_pickle(survey_filepath)
     survey = survey.drop(columns=["date"])
+    survey = survey.reset_index().astype(HH_WEATHER_KEY_DTYPES)
 
-    # Combine
-    survey_weather = survey.join(weather, how="left", validate="m:1")
-    survey_weather = survey_weather.reset_index()
+    # Combine on the int32 keys
+    survey_weather = survey.merge(
+        weather, on=["hhid", "wave", "visit"], how="left", validate="m:1"
+    )
     survey_weather = survey_weather.set_index(["hhid", "indiv", "wave", "visit"])
 
     # Export
@@ -581,7 +888,7 @@ def combine_with_poverty_index(
     household_subset_df = convert_point_crs(
         df=household_subset_df, target_epsg=epsg
     )  # convert to geo dataframe
-    dissolved_df = map_df.dissolve(col_dissolve).reset_index()
+    dissolved_df = dissolve_map(map_df, col_dissolve)
     admin_db = gpd.sjoin(dissolved_df, household_subset_df, predicate=method)
 
     # Calculate aggregate mean of the poverty index for each region
@@ -0,0 +1,28 @@
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# The package code is imported as "src..." from the surveyweathertool directory
+SURVEYWEATHERTOOL_PATH = Path(__file__).resolve().parents[1] / "surveyweathertool"
+sys.path.insert(0, str(SURVEYWEATHERTOOL_PATH))
+
+
+@pytest.fixture
+def http_server():
+    """Serve a BaseHTTPRequestHandler subclass on a local port and return the base URL."""
+    servers = []
+
+    def _serve(handler_class):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield _serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,49 @@
+import pytest
+
+from src.dashboard import utils as dashboard_utils
+from src.dashboard.utils import admin_weather_cube_path, source_file_sha256
+from src.weather.constants import DOWNLOAD_MANIFEST_NAME
+from src.weather.utils import file_sha256, write_download_manifest
+
+
+@pytest.fixture
+def weather_data_path(tmp_path):
+    weather_data_path = tmp_path / "joined_weather_data.parquet"
+    weather_data_path.write_bytes(b"joined weather data")
+    return weather_data_path
+
+
+def test_source_file_sha256_reads_the_download_manifest(weather_data_path):
+    manifest_sha256 = "a" * 64
+    write_download_manifest(
+        weather_data_path.parent / DOWNLOAD_MANIFEST_NAME,
+        {"drive-file-id": {"file": weather_data_path.name, "size": 19, "sha256": manifest_sha256}},
+    )
+
+    assert source_file_sha256(weather_data_path) == manifest_sha256
+
+
+def test_source_file_sha256_without_manifest(weather_data_path):
+    assert source_file_sha256(weather_data_path) == file_sha256(weather_data_path)
+
+
+def test_admin_weather_cube_path_changes_with_the_weather_data(weather_data_path, tmp_path):
+    cube_file = admin_weather_cube_path(weather_data_path, tmp_path / "cubes")
+    assert cube_file.parent == tmp_path / "cubes"
+    assert file_sha256(weather_data_path)[:16] in cube_file.name
+
+    weather_data_path.write_bytes(b"new joined weather data")
+    assert admin_weather_cube_path(weather_data_path, tmp_path / "cubes") != cube_file
+
+
+def test_load_admin_weather_cube_file(weather_data_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard_utils, "load_dashboard_file", lambda file_to_load: weather_data_path)
+    load_admin_weather_cube_file = dashboard_utils.load_admin_weather_cube_file.__wrapped__
+
+    with pytest.raises(ValueError, match="dashboard_cube_pipeline.py"):
+        load_admin_weather_cube_file(tmp_path / "cubes")
+
+    cube_file = admin_weather_cube_path(weather_data_path, tmp_path / "cubes")
+    cube_file.parent.mkdir()
+    cube_file.touch()
+    assert load_admin_weather_cube_file(tmp_path / "cubes") == cube_file
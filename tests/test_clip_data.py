@@ -0,0 +1,50 @@
+import geopandas as gpd
+import pandas as pd
+import pytest
+
+from tests.conftest import SURVEYWEATHERTOOL_PATH
+from src.weather import weather_pipeline
+from src.weather.weather_pipeline import clip_data, points_to_grid
+
+NIGERIA_SHAPE_PATH = SURVEYWEATHERTOOL_PATH / "data/nga_admin/nga_admbnda_adm2_osgof_20170222.shp"
+
+
+@pytest.fixture(scope="module")
+def nigeria_shape_df():
+    return gpd.read_file(NIGERIA_SHAPE_PATH).to_crs(epsg=4326)
+
+
+@pytest.fixture(autouse=True)
+def clip_masks_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(weather_pipeline, "CLIP_MASKS_PATH", tmp_path)
+    monkeypatch.setattr(weather_pipeline, "_CLIP_MASKS", {})
+
+
+def weather_points(lats, lons):
+    return pd.DataFrame({"date": pd.Timestamp("2015-01-01"), "lat": lats, "lon": lons, "temperature": 25.0})
+
+
+@pytest.mark.parametrize(
+    "lats, lons",
+    [([9.0, 9.0, 9.0], [7.0, 7.5, 8.0]), ([8.0, 8.5, 9.0], [7.0, 7.0, 7.0]), ([9.0], [7.0])],
+)
+@pytest.mark.parametrize("method", ["mask", "sjoin", "clip"])
+def test_clip_data_single_value_axis(nigeria_shape_df, lats, lons, method):
+    clipped_df = clip_data(weather_points(lats, lons), nigeria_shape_df, method=method)
+    assert len(clipped_df) == len(lats)
+
+
+def test_points_to_grid_single_value_axis():
+    assert points_to_grid(weather_points([9.0, 9.0, 9.0], [7.0, 7.5, 8.0])) is None
+    assert points_to_grid(weather_points([8.0, 8.5, 9.0], [7.0, 7.0, 7.0])) is None
+
+
+def test_clip_data_default_keeps_boundary_points(nigeria_shape_df):
+    # A vertex of an admin polygon is on its boundary, gpd.clip keeps it
+    vertex_lon, vertex_lat = nigeria_shape_df.geometry.boundary.get_coordinates().iloc[0]
+    df = weather_points([vertex_lat, 9.0, 20.0], [vertex_lon, 7.0, 20.0])
+
+    clipped_df = clip_data(df, nigeria_shape_df)
+    expected_df = clip_data(df, nigeria_shape_df, method="clip")
+
+    assert sorted(clipped_df.index) == sorted(expected_df.index) == [0, 1]
@@ -0,0 +1,122 @@
+import hashlib
+from functools import partial
+
+import pytest
+
+from src.dashboard import utils as dashboard_utils
+from src.dashboard.utils import DATA_SOURCE_BACKENDS, load_file_from_google_drive, load_file_from_local
+from src.weather.constants import DOWNLOAD_MANIFEST_NAME, JOINED_WEATHER_DATA_FILE
+from src.weather.utils import read_download_manifest
+
+FILE_ID = "drive-file-id"
+
+
+class FakeDriveService:
+    """Answer the files().get and files().get_media calls of load_file_from_google_drive."""
+
+    def __init__(self):
+        self.content = b"joined weather data"
+        self.modified_time = "2024-01-01T00:00:00.000Z"
+        self.offline = False
+        self.downloads = 0
+
+    def files(self):
+        return self
+
+    def get(self, fileId, fields):
+        return FakeDriveRequest(self, fileId)
+
+    def get_media(self, fileId):
+        self.downloads += 1
+        return self.content
+
+
+class FakeDriveRequest:
+    def __init__(self, service, file_id):
+        self.service = service
+        self.file_id = file_id
+
+    def execute(self):
+        if self.service.offline:
+            raise ConnectionError("No network")
+        return {
+            "name": "joined_weather_data.parquet",
+            "modifiedTime": self.service.modified_time,
+            "md5Checksum": hashlib.md5(self.service.content).hexdigest(),
+        }
+
+
+class FakeMediaDownload:
+    """Write the content of a FakeDriveService.get_media request in two chunks."""
+
+    def __init__(self, fh, request, chunksize):
+        self.fh = fh
+        self.chunks = [request[: len(request) // 2], request[len(request) // 2 :]]
+
+    def next_chunk(self):
+        self.fh.write(self.chunks.pop(0))
+        return None, not self.chunks
+
+
+@pytest.fixture
+def drive_service(monkeypatch):
+    service = FakeDriveService()
+    monkeypatch.setattr(dashboard_utils, "google_drive_service", lambda: service)
+    monkeypatch.setattr(dashboard_utils, "MediaIoBaseDownload", FakeMediaDownload)
+    return service
+
+
+def test_local_backend(tmp_path):
+    (tmp_path / "joined_weather_data.parquet").write_bytes(b"joined weather data")
+
+    assert load_file_from_local(JOINED_WEATHER_DATA_FILE, tmp_path) == tmp_path / "joined_weather_data.parquet"
+    assert load_file_from_local("joined_weather_data.parquet", tmp_path) == tmp_path / "joined_weather_data.parquet"
+
+
+def test_local_backend_missing_file(tmp_path):
+    with pytest.raises(ValueError, match="does not exist"):
+        load_file_from_local(JOINED_WEATHER_DATA_FILE, tmp_path)
+
+
+def test_google_drive_backend_cache_hit(drive_service, tmp_path):
+    cached_file = load_file_from_google_drive(FILE_ID, tmp_path)
+
+    assert cached_file.read_bytes() == drive_service.content
+    assert cached_file.name == f"{hashlib.sha256(drive_service.content).hexdigest()}.parquet"
+    assert load_file_from_google_drive(FILE_ID, tmp_path) == cached_file
+    assert drive_service.downloads == 1
+
+
+def test_google_drive_backend_new_version(drive_service, tmp_path):
+    old_file = load_file_from_google_drive(FILE_ID, tmp_path)
+
+    drive_service.content = b"new joined weather data"
+    drive_service.modified_time = "2024-02-01T00:00:00.000Z"
+    new_file = load_file_from_google_drive(FILE_ID, tmp_path)
+
+    assert drive_service.downloads == 2
+    assert new_file.read_bytes() == drive_service.content
+    assert not old_file.exists()
+    assert read_download_manifest(tmp_path / DOWNLOAD_MANIFEST_NAME)[FILE_ID]["file"] == new_file.name
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([new_file.name, DOWNLOAD_MANIFEST_NAME])
+
+
+def test_google_drive_backend_offline(drive_service, tmp_path):
+    cached_file = load_file_from_google_drive(FILE_ID, tmp_path)
+
+    drive_service.offline = True
+    assert load_file_from_google_drive(FILE_ID, tmp_path) == cached_file
+    assert drive_service.downloads == 1
+
+    with pytest.raises(ConnectionError):
+        load_file_from_google_drive("other-file-id", tmp_path)
+
+
+def test_load_dashboard_file_backends(tmp_path, monkeypatch):
+    (tmp_path / "joined_weather_data.parquet").write_bytes(b"joined weather data")
+    monkeypatch.setitem(DATA_SOURCE_BACKENDS, "local", partial(load_file_from_local, data_path=tmp_path))
+    load_dashboard_file = dashboard_utils.load_dashboard_file.__wrapped__
+
+    assert load_dashboard_file(JOINED_WEATHER_DATA_FILE, backend="local") == tmp_path / "joined_weather_data.parquet"
+    with pytest.raises(ValueError, match="Unknown backend"):
+        load_dashboard_file(JOINED_WEATHER_DATA_FILE, backend="dropbox")
@@ -0,0 +1,134 @@
+import hashlib
+import json
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from src.weather.constants import DOWNLOAD_MANIFEST_NAME
+from src.weather.utils import download_file, get_data
+
+# Several download chunks, so an interrupted transfer leaves whole chunks in the part file
+PAYLOAD = bytes(range(256)) * 16384
+
+
+def weather_file_server(http_server, ignore_range=False, interrupt_first=False):
+    """Serve PAYLOAD on every path, recording the Range header of every request."""
+
+    class WeatherFileHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        ranges = []
+        interrupted = [not interrupt_first]
+
+        def do_GET(self):
+            range_header = self.headers.get("Range")
+            self.ranges.append(range_header)
+            if range_header and not ignore_range:
+                start = int(range_header.split("=")[1].rstrip("-"))
+                if start >= len(PAYLOAD):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+                body = PAYLOAD[start:]
+            else:
+                self.send_response(200)
+                body = PAYLOAD
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not self.interrupted[0]:
+                # Drop the connection halfway through the transfer
+                self.interrupted[0] = True
+                self.wfile.write(body[: len(body) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return http_server(WeatherFileHandler), WeatherFileHandler.ranges
+
+
+def test_download_file_resumes_an_interrupted_transfer(http_server, tmp_path):
+    url, ranges = weather_file_server(http_server, interrupt_first=True)
+    file_path = tmp_path / "precip.2000.nc"
+
+    file_entry = download_file(f"{url}/precip.2000.nc", str(file_path), retries=1)
+
+    assert file_path.read_bytes() == PAYLOAD
+    assert ranges == [None, f"bytes={len(PAYLOAD) // 2}-"]
+    assert file_entry["size"] == len(PAYLOAD)
+    assert file_entry["sha256"] == hashlib.sha256(PAYLOAD).hexdigest()
+    assert not (tmp_path / "precip.2000.nc.part").exists()
+
+
+def test_download_file_resumes_from_the_part_file(http_server, tmp_path):
+    url, ranges = weather_file_server(http_server)
+    file_path = tmp_path / "precip.2000.nc"
+    (tmp_path / "precip.2000.nc.part").write_bytes(PAYLOAD[:1000])
+
+    download_file(f"{url}/precip.2000.nc", str(file_path))
+
+    assert file_path.read_bytes() == PAYLOAD
+    assert ranges == ["bytes=1000-"]
+
+
+def test_download_file_restarts_when_the_server_ignores_range(http_server, tmp_path):
+    url, ranges = weather_file_server(http_server, ignore_range=True)
+    file_path = tmp_path / "precip.2000.nc"
+    (tmp_path / "precip.2000.nc.part").write_bytes(b"x" * 1000)
+
+    download_file(f"{url}/precip.2000.nc", str(file_path))
+
+    assert file_path.read_bytes() == PAYLOAD
+    assert ranges == ["bytes=1000-"]
+
+
+def test_download_file_keeps_a_complete_part_file(http_server, tmp_path):
+    url, ranges = weather_file_server(http_server)
+    file_path = tmp_path / "precip.2000.nc"
+    (tmp_path / "precip.2000.nc.part").write_bytes(PAYLOAD)
+
+    download_file(f"{url}/precip.2000.nc", str(file_path))
+
+    assert file_path.read_bytes() == PAYLOAD
+    assert ranges == [f"bytes={len(PAYLOAD)}-"]
+
+
+def test_download_file_restarts_on_a_part_file_larger_than_the_server_file(http_server, tmp_path):
+    url, ranges = weather_file_server(http_server)
+    file_path = tmp_path / "precip.2000.nc"
+    (tmp_path / "precip.2000.nc.part").write_bytes(PAYLOAD + b"stale")
+
+    download_file(f"{url}/precip.2000.nc", str(file_path))
+
+    assert file_path.read_bytes() == PAYLOAD
+    assert ranges == [f"bytes={len(PAYLOAD) + 5}-", None]
+
+
+def test_download_file_checksum_mismatch(http_server, tmp_path):
+    url, _ = weather_file_server(http_server)
+    file_path = tmp_path / "precip.2000.nc"
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        download_file(f"{url}/precip.2000.nc", str(file_path), expected_checksum="0" * 64)
+
+    assert not file_path.exists()
+    assert not (tmp_path / "precip.2000.nc.part").exists()
+
+
+def test_get_data_skips_complete_files_on_rerun(http_server, tmp_path):
+    url, ranges = weather_file_server(http_server)
+
+    file_paths = get_data(f"{url}/precip.", str(tmp_path), "precip", 2000, 2002)
+
+    assert len(ranges) == 3
+    manifest = json.loads((tmp_path / DOWNLOAD_MANIFEST_NAME).read_text())
+    assert sorted(manifest) == ["precip.2000.nc", "precip.2001.nc", "precip.2002.nc"]
+
+    assert get_data(f"{url}/precip.", str(tmp_path), "precip", 2000, 2002) == file_paths
+    assert len(ranges) == 3
@@ -0,0 +1,82 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.weather.constants import OPEN_METEO_DAILY_VARIABLES
+from src.weather.utils import get_weather_for_household
+
+
+class OpenMeteoStub(BaseHTTPRequestHandler):
+    """Answer like the Open-Meteo archive API and count the requests."""
+
+    requests_count = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with OpenMeteoStub.lock:
+            OpenMeteoStub.requests_count += 1
+        params = {key: value[0] for key, value in parse_qs(urlparse(self.path).query).items()}
+        dates = pd.date_range(params["start_date"], params["end_date"]).strftime("%Y-%m-%d").tolist()
+        daily = {"time": dates}
+        for variable_indx, variable in enumerate(OPEN_METEO_DAILY_VARIABLES):
+            daily[variable] = [float(params["latitude"]) + variable_indx] * len(dates)
+        body = json.dumps(
+            {"latitude": float(params["latitude"]), "longitude": float(params["longitude"]), "daily": daily}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def open_meteo_url(http_server):
+    OpenMeteoStub.requests_count = 0
+    return http_server(OpenMeteoStub)
+
+
+@pytest.fixture
+def households():
+    rng = np.random.default_rng(0)
+    locations = pd.DataFrame({"lat": rng.uniform(4, 13, 200).round(4), "lon": rng.uniform(3, 14, 200).round(4)})
+    location_indx = rng.integers(0, 200, 5000)
+    location_indx[:200] = np.arange(200)
+    hh_data = locations.iloc[location_indx].reset_index(drop=True)
+    hh_data["date"] = pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 365, 5000), unit="D")
+    return hh_data
+
+
+def test_get_weather_for_household_one_request_per_location(households, open_meteo_url, tmp_path):
+    weather_df = get_weather_for_household(
+        households, requests_per_second=None, cache_path=tmp_path, base_url=open_meteo_url
+    )
+
+    assert OpenMeteoStub.requests_count == 200
+    assert len(weather_df) == households.drop_duplicates().shape[0]
+    assert weather_df[OPEN_METEO_DAILY_VARIABLES].notna().all().all()
+    np.testing.assert_allclose(weather_df[OPEN_METEO_DAILY_VARIABLES[0]], weather_df["lat"])
+    assert len(list(tmp_path.glob("*.json"))) == 200
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_get_weather_for_household_rerun_reads_the_cache(households, open_meteo_url, tmp_path):
+    first_df = get_weather_for_household(
+        households, requests_per_second=None, cache_path=tmp_path, base_url=open_meteo_url
+    )
+    OpenMeteoStub.requests_count = 0
+
+    rerun_df = get_weather_for_household(
+        households, requests_per_second=None, cache_path=tmp_path, base_url=open_meteo_url
+    )
+
+    assert OpenMeteoStub.requests_count == 0
+    pd.testing.assert_frame_equal(first_df, rerun_df)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from src.weather.source_weather_data import preprocess_data, run_partitioned_stage
+from src.weather.utils import append_to_dataset, dataset_to_pandas, open_weather_dataset
+
+
+def weather_stage(df, fail_after_year=None, engine="partitioned", output_path=None):
+    """Stage writing df year by year, killed after fail_after_year if given."""
+    weather_stage.calls += 1
+    for year, year_df in df.groupby("year"):
+        append_to_dataset(year_df, output_path, f"year-{year}")
+        if year == fail_after_year:
+            raise KeyboardInterrupt
+    return open_weather_dataset(output_path)
+
+
+@pytest.fixture
+def weather_df():
+    weather_stage.calls = 0
+    dates = pd.date_range("2000-01-01", "2002-12-31")
+    return pd.DataFrame(
+        {"date": dates, "lat": 9.0, "lon": 7.0, "precipitation": np.arange(len(dates), dtype=float), "year": dates.year}
+    )
+
+
+def test_run_partitioned_stage_reruns_an_interrupted_stage(weather_df, tmp_path):
+    stage_path = tmp_path / "precipitation_clipped"
+
+    with pytest.raises(KeyboardInterrupt):
+        run_partitioned_stage(stage_path, weather_stage, df=weather_df, fail_after_year=2000)
+    assert not stage_path.exists()
+
+    dataset = run_partitioned_stage(stage_path, weather_stage, df=weather_df)
+    assert weather_stage.calls == 2
+    assert not (tmp_path / "precipitation_clipped.tmp").exists()
+    assert len(dataset_to_pandas(dataset.to_table())) == len(weather_df)
+
+    run_partitioned_stage(stage_path, weather_stage, df=weather_df)
+    assert weather_stage.calls == 2
+
+
+def test_preprocess_data_writes_the_pipeline_columns(tmp_path):
+    source_path = tmp_path / "raw"
+    source_path.mkdir()
+    for year in [2000, 2001]:
+        time = pd.date_range(f"{year}-01-01", f"{year}-01-10")
+        xr.Dataset(
+            {"precip": (("time", "lat", "lon"), np.ones((len(time), 2, 2), dtype="float32"))},
+            coords={"time": time, "lat": [9.0, 9.5], "lon": [7.0, 7.5]},
+        ).to_netcdf(source_path / f"precip.{year}.nc", engine="scipy")
+
+    dataset_path = preprocess_data(
+        source_path, tmp_path / "processed", "precip", [4, 14, 2, 15], value_column="precipitation"
+    )
+
+    precipitation_df = dataset_to_pandas(open_weather_dataset(dataset_path).to_table())
+    assert {"date", "lat", "lon", "precipitation", "year"} <= set(precipitation_df.columns)
+    assert len(precipitation_df) == 2 * 10 * 4